@@ -2,27 +2,41 @@
 # Licensed under the MIT License. See LICENSE file for details.
 
 import random
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import json  # For saving and loading configurations as JSON
-
-# Universal list of items and base prices
-universal_items = {}
-
-# Define islands
-islands = {}
-
-# Function to calculate fluctuated prices
-def calculate_fluctuated_price(base_price):
-    fluctuation = random.uniform(-0.2, 0.2)
-    return round(base_price * (1 + fluctuation), 2)
-
-# Function to calculate adjusted prices
-def calculate_adjusted_price(price, modifier_percentage):
-    return round(price * (1 + modifier_percentage / 100), 2)
+from background import TaskRunner
+from diagnostics import instrumented, instruments
+from diagnostics_view import DiagnosticsWindow
+from item_grid import ItemModifierGrid
+from persistence import Journal, read_configuration, write_configuration
+from price_history import MAX_TICK, PriceHistory
+from pricing import ModifierIndex, PricingEngine, price_text
+from quote_server import DEFAULT_PORT, QuoteServer
+from results_view import ResultsRenderer
+from search_index import SearchIndex
+from world import DEFAULT_CATEGORIES, World
+
+# Define islands; they share the universal list of items and base prices
+islands = World()
+
+# Journal records before an automatic compaction, and the periodic compaction interval
+JOURNAL_COMPACT_RECORDS = 5000
+JOURNAL_COMPACT_INTERVAL_MS = 5 * 60 * 1000
+
+# Players connect to the quote server from their own laptops
+QUOTE_SERVER_HOST = "0.0.0.0"
+
+@instrumented("prepare_configuration")
+def prepare_configuration(config):
+    """Build the world and pricing engine of a loaded configuration; safe on a worker thread."""
+    world = World()
+    world.load_config(config)
+    return config, world, PricingEngine(world)
 
 # Tooltip class
 class Tooltip:
+    @instrumented("Tooltip")
     def __init__(self, widget, text):
         self.widget = widget
         self.text = text
@@ -63,18 +77,33 @@ class TradingApp:
     def __init__(self, root):
         self.root = root
         self.root.title("D&D Trading Program")
+        instruments.tcl = root.tk  # Count Tcl commands of instrumented operations
 
         # Variables
         self.selected_island = tk.StringVar()
         self.global_modifier = tk.IntVar(value=0)
-        self.item_entries = []
+        self.market_tick = tk.IntVar(value=0)
+        self.pricing_engine = PricingEngine(islands, market_seed=random.randrange(2 ** 32))
+        self.modifier_index = ModifierIndex(int)  # Grid row ids count up in grid order
+        self.results_island = None  # Island currently shown in the results
+        self.result_lines = {}  # Engine row -> displayed result line
+        self.journal = None  # Set while autosaving to a journal
+        self.compaction_job = None
+        self.price_history = None  # PriceHistory next to the journal, if one is open
+        self.history_recorded = {}  # (island, tick) -> hash of the prices last recorded
+        self.quote_server = None  # Set while sharing prices with players
+        self.quote_publish_job = None
+        self.search_indexes = {}  # island -> (category SearchIndex, item SearchIndex), built on first use
+        self.task_runner = TaskRunner(root, self.show_progress, self.on_busy_changed)  # Load, save and journal jobs
+        self.selected_island.trace_add("write", self.on_selected_island_changed)
+        self.global_modifier.trace_add("write", self.on_global_modifier_changed)
+        self.market_tick.trace_add("write", self.on_market_tick_changed)
 
         # Island Selection
         ttk.Label(root, text="Select Island:").grid(row=0, column=1, padx=10, pady=5, sticky="w")
         self.island_menu = ttk.Combobox(root, textvariable=self.selected_island, values=list(islands.keys()), state="readonly")
         self.island_menu.grid(row=0, column=2, padx=10, pady=5)
         Tooltip(self.island_menu, "Select an island to trade specific items.")
-        self.island_menu.bind("<<ComboboxSelected>>", self.update_items_options)
 
         # Create New Island Button
         self.create_new_island_button = ttk.Button(root, text="Create New Island", command=self.create_new_island)
@@ -92,16 +121,23 @@ class TradingApp:
         self.items_frame = ttk.Frame(root)
         self.items_frame.grid(row=2, column=1, columnspan=4, padx=10, pady=5, sticky="w")
 
-        # Add headers for the item selection modifiers
-        ttk.Label(self.items_frame, text="Category").grid(row=0, column=0, padx=5, pady=2, sticky="w")
-        ttk.Label(self.items_frame, text="Item").grid(row=0, column=1, padx=5, pady=2, sticky="w")
-        ttk.Label(self.items_frame, text="Sell Modifier (%)").grid(row=0, column=2, padx=5, pady=2, sticky="w")
-        ttk.Label(self.items_frame, text="Buy Modifier (%)").grid(row=0, column=3, padx=5, pady=2, sticky="w")
-        ttk.Label(self.items_frame, text="Quantity").grid(row=0, column=4, padx=5, pady=2, sticky="w")
-        ttk.Label(self.items_frame, text="Actions").grid(row=0, column=5, padx=5, pady=2, sticky="w")
+        # Item rows live in a virtualized table; only visible rows are drawn
+        self.item_grid = ItemModifierGrid(
+            self.items_frame, self.island_categories, self.island_items, self.is_island_value, self.on_item_row_changed
+        )
+        self.item_grid.grid(row=0, column=0, columnspan=2, padx=5, pady=2, sticky="w")
+        Tooltip(self.item_grid.tree, "Double-click a cell to edit it.")
 
-        # Add initial item row
         self.add_item_button = ttk.Button(self.items_frame, text="Add Another Item", command=self.add_item_row)
+        self.add_item_button.grid(row=1, column=0, padx=5, pady=10, sticky="w")
+        Tooltip(self.add_item_button, "Add a new item row.")
+
+        remove_item_button = ttk.Button(self.items_frame, text="Remove Selected", command=self.remove_selected_rows)
+        remove_item_button.grid(row=1, column=1, padx=5, pady=10, sticky="w")
+        Tooltip(remove_item_button, "Remove the selected item rows.")
+        self.item_grid.tree.bind("<Delete>", lambda event: self.remove_selected_rows())
+
+        # Add initial item row
         self.add_item_row()
 
         # Add Custom Item Button
@@ -114,14 +150,42 @@ class TradingApp:
         self.calculate_prices_button.grid(row=5, column=1, padx=10, pady=5, sticky="w")
         Tooltip(self.calculate_prices_button, "Calculate final prices for selected items.")
 
-        # Save and Load Buttons
-        save_button = ttk.Button(root, text="Save Configuration", command=self.save_configuration)
-        save_button.grid(row=6, column=1, padx=10, pady=10, sticky="w")
-        Tooltip(save_button, "Save the current configuration, including islands and items.")
+        # Market Day; prices only fluctuate when the day changes
+        market_frame = ttk.Frame(root)
+        market_frame.grid(row=5, column=2, columnspan=2, padx=10, pady=5, sticky="w")
+        ttk.Label(market_frame, text="Market Day:").pack(side="left")
+        market_tick_spinbox = ttk.Spinbox(market_frame, from_=0, to=100000, increment=1, textvariable=self.market_tick, width=8)
+        market_tick_spinbox.pack(side="left", padx=5)
+        Tooltip(market_tick_spinbox, "Prices are the same every time for a given day. Change the day to move the market.")
+        next_day_button = ttk.Button(market_frame, text="Next Day", command=self.next_market_day)
+        next_day_button.pack(side="left")
+        Tooltip(next_day_button, "Advance the market by one day.")
 
-        load_button = ttk.Button(root, text="Load Configuration", command=self.load_configuration)
-        load_button.grid(row=6, column=2, padx=10, pady=10, sticky="w")
-        Tooltip(load_button, "Load a previously saved configuration.")
+        # Save and Load Buttons
+        self.save_button = ttk.Button(root, text="Save Configuration", command=self.save_configuration)
+        self.save_button.grid(row=6, column=1, padx=10, pady=10, sticky="w")
+        Tooltip(self.save_button, "Save the current configuration, including islands and items.")
+
+        self.load_button = ttk.Button(root, text="Load Configuration", command=self.load_configuration)
+        self.load_button.grid(row=6, column=2, padx=10, pady=10, sticky="w")
+        Tooltip(self.load_button, "Load a previously saved configuration.")
+
+        # Progress of the running load, save or journal job
+        progress_frame = ttk.Frame(root)
+        progress_frame.grid(row=6, column=3, padx=10, pady=10, sticky="w")
+        self.progress_bar = ttk.Progressbar(progress_frame, mode="determinate", maximum=1.0, length=150)
+        self.progress_bar.pack(side="left")
+        self.cancel_button = ttk.Button(progress_frame, text="Cancel", command=self.task_runner.cancel, state="disabled")
+        self.cancel_button.pack(side="left", padx=5)
+        Tooltip(self.cancel_button, "Stop the running load or save.")
+
+        self.journal_button = ttk.Button(root, text="Open Journal", command=self.open_journal)
+        self.journal_button.grid(row=6, column=4, padx=10, pady=10, sticky="w")
+        Tooltip(self.journal_button, "Open or start a journal that autosaves every change.")
+
+        self.share_prices_button = ttk.Button(root, text="Share Prices", command=self.toggle_quote_server)
+        self.share_prices_button.grid(row=6, column=5, padx=10, pady=10, sticky="w")
+        Tooltip(self.share_prices_button, f"Let players look up prices over the network on port {DEFAULT_PORT}.")
 
         # Results Display
         ttk.Label(root, text="Results:").grid(row=7, column=1, padx=10, pady=5, sticky="nw")
@@ -145,13 +209,26 @@ class TradingApp:
         # Configure scrollbars to control the text widget
         v_scrollbar.config(command=self.result_display.yview)
         h_scrollbar.config(command=self.result_display.xview)
+        self.results_renderer = ResultsRenderer(self.result_display)
 
+        # Paging for results larger than one page
+        results_nav = ttk.Frame(root)
+        results_nav.grid(row=8, column=2, columnspan=2, padx=10, pady=10, sticky="w")
+        ttk.Button(results_nav, text="Previous Page", command=self.results_renderer.previous_page).pack(side="left")
+        ttk.Label(results_nav, textvariable=self.results_renderer.page_label).pack(side="left", padx=10)
+        ttk.Button(results_nav, text="Next Page", command=self.results_renderer.next_page).pack(side="left")
 
         # Credits Button
         credits_button = ttk.Button(root, text="Credits", command=self.show_credits)
         credits_button.grid(row=8, column=4, padx=10, pady=10, sticky="e")
         Tooltip(credits_button, "View application credits.")
 
+        diagnostics_button = ttk.Button(root, text="Diagnostics", command=lambda: DiagnosticsWindow(self.root))
+        diagnostics_button.grid(row=8, column=5, padx=10, pady=10, sticky="e")
+        Tooltip(diagnostics_button, "Record and show how long operations take.")
+
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def show_credits(self):
         """Show a credits window."""
         credits_window = tk.Toplevel(self.root)
@@ -166,92 +243,132 @@ class TradingApp:
 
         ttk.Button(credits_window, text="Close", command=credits_window.destroy).pack(pady=20)
 
+    @instrumented("add_item_row")
     def add_item_row(self):
         """Add a new row for item selection and modifiers."""
-        category_var = tk.StringVar()
-        item_var = tk.StringVar()
-        sell_modifier = tk.IntVar(value=0)
-        buy_modifier = tk.IntVar(value=0)
-        quantity_var = tk.StringVar(value="None")
-    
-        # Dynamically fetch the latest items and categories for the selected island
-        selected_island = self.selected_island.get()
-        categories = list(islands[selected_island].keys()) if selected_island in islands else []
-        available_items = list(islands[selected_island][categories[0]].keys()) if categories else []
-    
-        row_index = len(self.item_entries) + 1
-    
-        # Category Dropdown
-        category_dropdown = ttk.Combobox(self.items_frame, textvariable=category_var, values=categories, state="readonly", width=30)
-        category_dropdown.grid(row=row_index, column=0, padx=5, pady=2, sticky="w")
-        Tooltip(category_dropdown, "Select a category.")
-    
-        def update_items_for_category(event=None):
-            """Update items dropdown when a category is selected."""
-            selected_category = category_var.get()
-            available_items = list(islands[selected_island][selected_category].keys()) if selected_category in islands[selected_island] else []
-            dropdown["values"] = available_items
-    
-        category_dropdown.bind("<<ComboboxSelected>>", update_items_for_category)
-    
-        # Item Dropdown
-        dropdown = ttk.Combobox(self.items_frame, textvariable=item_var, values=available_items, state="readonly")
-        dropdown.grid(row=row_index, column=1, padx=5, pady=2, sticky="w")
-        Tooltip(dropdown, "Select an item to trade.")
-    
-        # Sell Modifier Spinbox
-        sell_spinbox = ttk.Spinbox(self.items_frame, from_=-100, to=100, increment=5, textvariable=sell_modifier, width=10)
-        sell_spinbox.grid(row=row_index, column=2, padx=5, pady=2)
-        Tooltip(sell_spinbox, "Set a modifier for the sell price of the selected item.")
-    
-        # Buy Modifier Spinbox
-        buy_spinbox = ttk.Spinbox(self.items_frame, from_=-100, to=100, increment=5, textvariable=buy_modifier, width=10)
-        buy_spinbox.grid(row=row_index, column=3, padx=5, pady=2)
-        Tooltip(buy_spinbox, "Set a modifier for the buy price of the selected item.")
-    
-        # Quantity Dropdown
-        quantity_dropdown = ttk.Combobox(self.items_frame, textvariable=quantity_var, values=["None", "Normal", "Low", "High"], state="readonly")
-        quantity_dropdown.grid(row=row_index, column=4, padx=5, pady=2, sticky="w")
-        Tooltip(quantity_dropdown, "Select the quantity of the item.")
-    
-        # Remove Button
-        remove_button = ttk.Button(self.items_frame, text="Remove", command=lambda: self.remove_item_row(row_index - 1))
-        remove_button.grid(row=row_index, column=5, padx=5, pady=2)
-        Tooltip(remove_button, "Remove this item entry.")
-    
-        self.item_entries.append((category_var, item_var, sell_modifier, buy_modifier, quantity_var, category_dropdown, dropdown, sell_spinbox, buy_spinbox, quantity_dropdown, remove_button))
-    
-        self.add_item_button.grid(row=row_index + 1, column=5, padx=5, pady=10, sticky="w")
-
-
-    def remove_item_row(self, row_index):
+        row_id = self.item_grid.add_row()
+        self.journal_record("row_changed", row=row_id, values=self.item_grid.rows[row_id].to_dict())
+        return row_id
+
+    @instrumented("remove_item_row")
+    def remove_item_row(self, row_id):
         """Remove a specific item row."""
-        if 0 <= row_index < len(self.item_entries):
-            entry = self.item_entries.pop(row_index)
+        self.item_grid.remove_row(row_id)
+        self.journal_record("row_removed", row=row_id)
+        self.apply_modifier_changes(self.modifier_index.remove_row(row_id))
 
-            for widget in entry[4:]:
-                if hasattr(widget, "destroy"):
-                    widget.destroy()
+    def remove_selected_rows(self):
+        """Remove every selected item row."""
+        for row_id in self.item_grid.selected_rows():
+            self.remove_item_row(row_id)
 
-            for i, (_, _, _, _, dropdown, sell_spinbox, buy_spinbox, quantity_dropdown, button) in enumerate(self.item_entries):
-                dropdown.grid(row=i + 1, column=0, padx=5, pady=2, sticky="w")
-                sell_spinbox.grid(row=i + 1, column=1, padx=5, pady=2)
-                buy_spinbox.grid(row=i + 1, column=2, padx=5, pady=2)
-                quantity_dropdown.grid(row=i + 1, column=3, padx=5, pady=2, sticky="w")
-                button.grid(row=i + 1, column=4, padx=5, pady=2)
+    def island_search(self):
+        """Return the (category, item) search indexes of the selected island, or None."""
+        selected_island = self.selected_island.get()
+        if selected_island not in islands:
+            return None
+        indexes = self.search_indexes.get(selected_island)
+        if indexes is None:
+            island = islands[selected_island]
+            indexes = self.search_indexes[selected_island] = (
+                SearchIndex((category, None) for category in island),
+                SearchIndex((item_name, category) for category, items in island.items() for item_name in items),
+            )
+        return indexes
+
+    def island_categories(self, query=""):
+        """Return the categories of the selected island matching a query."""
+        indexes = self.island_search()
+        return indexes[0].search(query) if indexes else []
+
+    def island_items(self, category, query=""):
+        """Return the items of one category, or of every category if none is given, matching a query."""
+        indexes = self.island_search()
+        return indexes[1].search(query, category or None) if indexes else []
+
+    def is_island_value(self, column, row, value):
+        """Return whether a value typed into an item row is a category or item of the selected island."""
+        indexes = self.island_search()
+        if indexes is None:
+            return False
+        if column == "category":
+            return indexes[0].has(value)
+        return indexes[1].has(value, row.category or None)
+
+    def on_item_row_changed(self, row_id):
+        """Re-index one item row after its category, item or modifiers change."""
+        self.journal_record("row_changed", row=row_id, values=self.item_grid.rows[row_id].to_dict())
+        self.apply_modifier_changes(self.index_item_row(row_id))
+
+    def index_item_row(self, row_id):
+        """Record one item row in the modifier index and return the keys it affected."""
+        selected_island = self.selected_island.get()
+        row = self.item_grid.rows[row_id]
+        category = row.category or self.pricing_engine.find_category(selected_island, row.item)
+        key = (selected_island, category, row.item)
+        return self.modifier_index.update_row(row_id, key, row.sell_modifier, row.buy_modifier, row.quantity)
+
+    def apply_modifier_changes(self, keys):
+        """Push the indexed modifiers of the given keys into the pricing engine."""
+        for key in keys:
+            self.pricing_engine.set_item_modifiers(*key, *self.modifier_index.modifiers(key))
+        self.refresh_results()
+        self.publish_quotes()
+
+    def on_selected_island_changed(self, *args):
+        """Item rows apply to the selected island, so re-index them all."""
+        self.journal_record("selected_island", value=self.selected_island.get())
+        self.rebuild_modifier_index()
+
+    def rebuild_modifier_index(self):
+        """Re-index every item row, e.g. after the selected island changes."""
+        self.modifier_index.clear()
+        self.pricing_engine.reset_modifiers()
+        keys = set()
+        for row_id in self.item_grid.rows:
+            keys.update(self.index_item_row(row_id))
+        self.apply_modifier_changes(keys)
+
+    def on_global_modifier_changed(self, *args):
+        """Reprice the displayed island after the global modifier changes."""
+        try:
+            global_modifier = self.global_modifier.get()
+        except tk.TclError:
+            return  # Spinbox holds a partially typed number
+        self.journal_record("global_modifier", value=global_modifier)
+        self.pricing_engine.set_global_modifier(global_modifier)
+        self.refresh_results()
+        self.publish_quotes()
+
+    def on_market_tick_changed(self, *args):
+        """Show the prices of another market day."""
+        try:
+            market_tick = self.market_tick.get()
+        except tk.TclError:
+            return  # Spinbox holds a partially typed number
+        if not 0 <= market_tick <= MAX_TICK:
+            self.market_tick.set(min(max(market_tick, 0), MAX_TICK))  # Comes back here with a valid day
+            return
+        if market_tick == self.pricing_engine.market_tick:
+            return
+        self.journal_record("market_tick", value=market_tick)
+        self.pricing_engine.set_market(market_tick=market_tick)
+        self.refresh_results()
+        self.publish_quotes()
 
-            self.add_item_button.grid(row=len(self.item_entries) + 1, column=4, padx=5, pady=10, sticky="w")
+    def next_market_day(self):
+        self.market_tick.set(self.pricing_engine.market_tick + 1)
 
-    def update_items_options(self, event=None):
-        """Update the item dropdown options based on the selected island and categories."""
-        selected_island = self.selected_island.get()
-        if selected_island in islands:
-            items = []
-            for category, category_items in islands[selected_island].items():
-                items.extend(category_items.keys())
-            for entry in self.item_entries:
-                dropdown = entry[4]
-                dropdown["values"] = items
+    def on_islands_changed(self, rebuild=True):
+        """Update the displayed prices after islands or items were added or loaded.
+
+        The pricing engine is rebuilt unless the change was already added to it.
+        """
+        if rebuild:
+            self.pricing_engine.load_islands(islands)
+        self.result_lines = {}  # Engine rows were renumbered
+        self.refresh_results()
+        self.publish_quotes()
 
     def create_new_island(self):
        """Create a new island with predefined categories."""
@@ -263,23 +380,15 @@ class TradingApp:
        island_name_entry.grid(row=0, column=1, padx=10, pady=5, sticky="w")
   
        def save_new_island():
+           if self.refuse_while_busy():
+               return
            island_name = island_name_entry.get().strip()
            if island_name and island_name not in islands:
-               islands[island_name] = {
-                   "Textiles and Fabrics": {},
-                   "Food and Beverages": {},
-                   "Spices and Plants": {},
-                   "Tools, Ship and Supplies": {},
-                   "Animal and Livestock Products": {},
-                   "Trade Goods": {},
-                   "Artistic and Decorative Items": {},
-                   "Rare and Collectible Items": {},
-                   "Religious and Cultural Items": {},
-                   "Furniture and Household Goods": {},
-                   "Navigation and Writing Tools": {},
-                   "Weapons and Explosives": {},
-               }
+               islands.add_island(island_name, DEFAULT_CATEGORIES)
+               self.pricing_engine.add_island(island_name, islands[island_name])
+               self.journal_record("island_created", island=island_name, categories=list(DEFAULT_CATEGORIES))
                self.island_menu["values"] = list(islands.keys())
+               self.on_islands_changed(rebuild=False)
                new_island_window.destroy()
            else:
                messagebox.showerror("Error", "Island name is invalid or already exists!")
@@ -325,23 +434,40 @@ class TradingApp:
 
         def save_custom_item():
             """Save the custom item."""
+            if self.refuse_while_busy():
+                return
             item_name = item_name_entry.get().strip()
             try:
                 item_price = int(item_price_entry.get())
                 selected_category = category_var.get()
                 if item_name and item_price > 0 and selected_category:
-                    # Add item to the current island
-                    islands[self.selected_island.get()][selected_category][item_name] = item_price
-
-                    # If apply_to_all is checked, add the item to all other islands
+                    # If apply_to_all is checked, add the item to the universal catalog
+                    # shared by every island, replacing every island's own price for it;
+                    # otherwise only to the current island
                     if apply_to_all_var.get():
-                        for island_name, island_categories in islands.items():
-                            if selected_category not in island_categories:
-                                island_categories[selected_category] = {}
-                            island_categories[selected_category][item_name] = item_price
-
+                        islands.add_universal_item(selected_category, item_name, item_price)
+                        self.pricing_engine.add_universal_item(selected_category, item_name, item_price)
+                        search_indexes = self.search_indexes.values()
+                    else:
+                        islands.add_item(self.selected_island.get(), selected_category, item_name, item_price)
+                        self.pricing_engine.add_items([(self.selected_island.get(), selected_category, item_name, item_price)])
+                        search_indexes = filter(None, [self.search_indexes.get(self.selected_island.get())])
+
+                    # Keep the item selectors' search indexes up to date
+                    for category_index, item_index in search_indexes:
+                        category_index.add(selected_category)
+                        item_index.add(item_name, selected_category)
+
+                    self.journal_record(
+                        "item_added",
+                        island=self.selected_island.get(),
+                        category=selected_category,
+                        item=item_name,
+                        price=item_price,
+                        all_islands=apply_to_all_var.get(),
+                    )
+                    self.on_islands_changed(rebuild=False)
                     custom_item_window.destroy()
-                    self.update_items_options()  # Refresh item dropdowns
                 else:
                     raise ValueError
             except ValueError:
@@ -351,6 +477,7 @@ class TradingApp:
         ttk.Button(custom_item_window, text="Confirm", command=save_custom_item).grid(row=4, column=0, columnspan=2, pady=20)
 
 
+    @instrumented("calculate_prices")
     def calculate_prices(self):
         """Calculate and display final buy and sell prices grouped by categories."""
         selected_island = self.selected_island.get()
@@ -358,71 +485,164 @@ class TradingApp:
             messagebox.showerror("Error", "Please select an island first!")
             return
 
-        global_modifier = self.global_modifier.get()
-        results = {}
-
-        for category, items in islands[selected_island].items():
-            results[category] = []
-            for item_name, base_price in items.items():
-                # Calculate fluctuated and adjusted prices
-                fluctuated_price = calculate_fluctuated_price(base_price)
-
-                # Find relevant modifiers from item entries
-                sell_modifier = 0
-                buy_modifier = 0
-                for entry in self.item_entries:
-                    if entry[1].get() == item_name:  # Match item_var
-                        sell_modifier = entry[2].get()  # sell_modifier
-                        buy_modifier = entry[3].get()  # buy_modifier
-                        break
-
-                # Apply modifiers
-                final_sell_price = calculate_adjusted_price(fluctuated_price, sell_modifier + global_modifier)
-                final_buy_price = calculate_adjusted_price(fluctuated_price, buy_modifier + global_modifier)
-
-                # Add the result for this item
-                results[category].append(
-                    f"{item_name} - Sell Price: {final_sell_price}, Buy Price: {final_buy_price}"
-                )
-
-        # Clear and display categorized results
-        self.result_display.delete(1.0, tk.END)
-        for category, items in results.items():
-            self.result_display.insert(tk.END, f"{category}\n{'=' * len(category)}\n")
-            for item in items:
-                self.result_display.insert(tk.END, f"{item}\n")
-            self.result_display.insert(tk.END, "\n")
+        # Fluctuations of the current market day; modifiers are already indexed in the engine
+        self.pricing_engine.fluctuate(selected_island)
+        if selected_island != self.results_island:
+            self.results_island = selected_island
+            self.result_lines = {}
+            self.results_renderer.page = 0
+        self.refresh_results()
+        self.record_price_history(selected_island)
+
+    @instrumented("record_price_history")
+    def record_price_history(self, island_name):
+        """Append the island's prices of the current day to the price history, unless already recorded."""
+        if self.price_history is None:
+            return
+        engine = self.pricing_engine
+        rows = engine.island_rows(island_name)
+        sell, buy = engine.sell_prices[rows], engine.buy_prices[rows]
+        key = (island_name, engine.market_tick)
+        digest = hash((sell.tobytes(), buy.tobytes()))
+        if self.history_recorded.get(key) == digest:
+            return
+        self.history_recorded[key] = digest
+        self.price_history.append(engine.market_tick, island_name, engine.row_category_names(rows), engine.item_names[rows], sell, buy)
+
+    @instrumented("refresh_results")
+    def refresh_results(self):
+        """Reprice only the changed items of the displayed island and redraw the results."""
+        engine = self.pricing_engine
+        if self.results_island not in engine.island_offsets:
+            return
 
+        # Only rewrite the changed lines while the layout is unchanged
+        redraw = not self.result_lines
+        start, end = engine.island_offsets[self.results_island]
+        rows = engine.reprice(self.results_island).tolist()
+        if redraw:
+            rows = list(range(start, end))  # Every line, even of rows that were not repriced
+        changed = {}
+        for row, final_sell_price, final_buy_price in zip(
+            rows, engine.sell_prices[rows].tolist(), engine.buy_prices[rows].tolist()
+        ):
+            line = f"{engine.item_names[row]} - Sell Price: {price_text(final_sell_price)}, Buy Price: {price_text(final_buy_price)}"
+            if self.result_lines.get(row) != line:
+                changed[row] = line
+        self.result_lines.update(changed)
+        if not redraw:
+            self.results_renderer.update_lines(changed)
+            return
 
-    def save_configuration(self):
-        """Save the current configuration to a JSON file."""
-        config = {
+        results = {category: [] for category in engine.island_categories[self.results_island]}
+        category_names = engine.categories.names
+        for row, category_id in enumerate(engine.row_categories[start:end].tolist(), start):
+            results[category_names[category_id]].append(row)
+
+        # Build the categorized results in one batch
+        keyed_lines = []
+        for category, category_rows in results.items():
+            keyed_lines.append((None, category))
+            keyed_lines.append((None, "=" * len(category)))
+            keyed_lines.extend((row, self.result_lines[row]) for row in category_rows)
+            keyed_lines.append((None, ""))
+        self.results_renderer.set_lines(keyed_lines)
+
+    def current_configuration(self):
+        """Return a copy of the world and item rows in the saved configuration shape, safe to encode on another thread."""
+        return {
             "selected_island": self.selected_island.get(),
-            "global_modifier": self.global_modifier.get(),
-            "item_entries": [
-                {
-                    "category": entry[0].get(),
-                    "item": entry[1].get(),
-                    "sell_modifier": entry[2].get(),
-                    "buy_modifier": entry[3].get(),
-                    "quantity": entry[4].get(),
-                }
-                for entry in self.item_entries
-            ],
-            "islands": islands,  # Include the custom islands and their items
+            "global_modifier": self.pricing_engine.global_modifier,
+            "market_seed": self.pricing_engine.market_seed,
+            "market_tick": self.pricing_engine.market_tick,
+            "item_entries": [row.to_dict() for row in self.item_grid.rows.values()],
+            **islands.to_config(),  # Include the universal items and each island's own items
         }
+
+    def save_configuration(self):
+        """Save the current configuration to a JSON file."""
+        config = self.current_configuration()
         file_path = filedialog.asksaveasfilename(
             defaultextension=".json",
             filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
             title="Save Configuration",
         )
         if file_path:
-            try:
-                with open(file_path, "w") as file:
-                    json.dump(config, file, indent=4)
-                messagebox.showinfo("Success", "Configuration saved successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to save configuration: {e}")
+            # The config is a copy of the world; adding islands and items is still refused while the job runs
+            self.task_runner.run(
+                lambda task: write_configuration(file_path, config, task.progress),
+                lambda result: messagebox.showinfo("Success", "Configuration saved successfully!"),
+                lambda e: messagebox.showerror("Error", f"Failed to save configuration: {e}"),
+            )
+
+    def show_progress(self, fraction):
+        """Show how far a long-running operation has got; None just shows it is still working."""
+        if fraction is None:
+            self.progress_bar.step(0.05)
+        else:
+            self.progress_bar["value"] = fraction
+        self.progress_bar.update_idletasks()
+
+    def on_busy_changed(self, busy):
+        """Block the actions that conflict with a running job and allow cancelling it."""
+        for button in (
+            self.save_button,
+            self.load_button,
+            self.journal_button,
+            self.create_new_island_button,
+            self.add_custom_item_button,
+            self.calculate_prices_button,
+        ):
+            button.state(["disabled"] if busy else ["!disabled"])
+        self.cancel_button.state(["!disabled"] if busy else ["disabled"])
+        self.progress_bar["value"] = 0
+
+    def refuse_while_busy(self):
+        """Return True, after telling the user, if a running job must finish before the world changes.
+
+        Jobs read or replace the world, e.g. a save encodes its dicts, so dialogs
+        opened before the job started must not change it meanwhile.
+        """
+        if not self.task_runner.busy():
+            return False
+        messagebox.showerror("Error", "Please wait for the running load or save to finish!")
+        return True
+
+    @instrumented("apply_configuration")
+    def apply_configuration(self, config, world=None, engine=None):
+        """Replace the world and item rows with a loaded configuration.
+
+        The world and pricing engine may already have been built from it on a
+        worker thread, see prepare_configuration.
+        """
+        global islands
+
+        # Restore the islands and their items
+        self.item_grid.clear()
+        if world is None:
+            world = World()
+            world.load_config(config)  # Load islands, default to empty if not found
+        islands = world
+        self.search_indexes = {}
+        self.island_menu["values"] = list(islands.keys())
+        self.results_island = None  # Prices of the loaded world are calculated on demand
+        if engine is None:
+            self.on_islands_changed()
+        else:
+            engine.market_seed = self.pricing_engine.market_seed
+            self.pricing_engine = engine
+            self.result_lines = {}
+            self.publish_quotes()
+
+        # Set the selected island, global modifier and market
+        self.selected_island.set(config.get("selected_island", ""))
+        self.global_modifier.set(config.get("global_modifier", 0))
+        self.pricing_engine.set_market(market_seed=config.get("market_seed", self.pricing_engine.market_seed))
+        self.market_tick.set(config.get("market_tick", 0))
+
+        # Recreate item rows from the loaded configuration in one pass
+        self.item_grid.add_rows(config.get("item_entries", []))
+        self.rebuild_modifier_index()
 
     def load_configuration(self):
         """Load a configuration from a JSON file."""
@@ -431,45 +651,132 @@ class TradingApp:
             title="Load Configuration",
         )
         if file_path:
+            # Read and index on a worker thread, then swap the results in here
+            self.task_runner.run(
+                lambda task: prepare_configuration(read_configuration(file_path, progress=task.progress)),
+                self.finish_loading_configuration,
+                lambda e: messagebox.showerror("Error", f"Failed to load configuration: {e}"),
+            )
+
+    def finish_loading_configuration(self, prepared):
+        try:
+            self.apply_configuration(*prepared)
+            if self.journal is not None:
+                self.compact_journal(wait=True)  # The loaded world replaces everything journaled so far
+            messagebox.showinfo("Success", "Configuration loaded successfully!")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load configuration: {e}")
+
+    def open_journal(self, file_path=None):
+        """Replay a journal (or start a new one) and autosave every change to it."""
+        if self.task_runner.busy():
+            return
+        if file_path is None:
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".json",
+                filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+                title="Open Journal",
+                confirmoverwrite=False,
+            )
+        if not file_path:
+            return
+        if self.journal is not None and self.journal.snapshot_path == file_path:
+            self.close_journal()  # Both would write the same files; otherwise the journal is swapped once replayed
+
+        def replay(task):
+            journal = Journal(file_path)
             try:
-                with open(file_path, "r") as file:
-                    config = json.load(file)
-
-                # Restore the islands and their items
-                global islands
-                islands = config.get("islands", {})  # Load islands, default to empty if not found
-                self.island_menu["values"] = list(islands.keys())
-
-                # Set the selected island and global modifier
-                self.selected_island.set(config.get("selected_island", ""))
-                self.global_modifier.set(config.get("global_modifier", 0))
-
-                # Clear existing item rows
-                for entry in self.item_entries:
-                    for widget in entry[5:]:  # Widgets are stored starting from index 5
-                        if hasattr(widget, "destroy"):
-                            widget.destroy()
-
-                self.item_entries = []  # Reset the item entries list
-
-                # Recreate item rows from the loaded configuration
-                for saved_entry in config.get("item_entries", []):
-                    # Create a new row
-                    self.add_item_row()
-
-                    # Populate the row with saved data
-                    current_entry = self.item_entries[-1]  # Get the most recently added entry
-                    current_entry[0].set(saved_entry["category"])  # category_var
-                    current_entry[1].set(saved_entry["item"])      # item_var
-                    current_entry[2].set(saved_entry["sell_modifier"])  # sell_modifier
-                    current_entry[3].set(saved_entry["buy_modifier"])   # buy_modifier
-                    current_entry[4].set(saved_entry["quantity"])       # quantity_var
-
-                messagebox.showinfo("Success", "Configuration loaded successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load configuration: {e}")
+                return journal, prepare_configuration(journal.replay(progress=task.progress))
+            except BaseException:
+                journal.close()
+                raise
+
+        self.task_runner.run(
+            replay, self.finish_opening_journal, lambda e: messagebox.showerror("Error", f"Failed to open journal: {e}")
+        )
+
+    def finish_opening_journal(self, replayed):
+        journal, prepared = replayed
+        self.close_journal()  # Replayed fine, so swap journals; loading the world is journaled to neither
+        try:
+            self.apply_configuration(*prepared)
+            self.journal = journal
+            self.price_history = PriceHistory(journal.snapshot_path + ".history")  # Every calculation is kept
+            self.compact_journal()
+            if self.compaction_job is None:
+                self.compaction_job = self.root.after(JOURNAL_COMPACT_INTERVAL_MS, self.periodic_compaction)
+        except Exception as e:
+            self.journal = self.price_history = None
+            journal.close()
+            messagebox.showerror("Error", f"Failed to open journal: {e}")
+
+    def close_journal(self):
+        """Stop autosaving and recording price history."""
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = None
+        self.price_history = None
+        self.history_recorded = {}
+
+    def journal_record(self, op, **fields):
+        """Append one change to the journal, if autosaving."""
+        if self.journal is None:
+            return
+        self.journal.append(op, **fields)
+        if self.journal.records_since_compaction >= JOURNAL_COMPACT_RECORDS:
+            self.compact_journal()
+
+    def compact_journal(self, wait=False):
+        """Fold the journal into a fresh snapshot in the background."""
+        config = self.current_configuration()  # A copy, encoded on the compaction thread while the world changes
+        config["row_ids"] = list(self.item_grid.rows)  # Journal records refer to rows by id
+        self.journal.compact(config, wait)
+
+    def periodic_compaction(self):
+        self.compaction_job = None
+        if self.journal is None:
+            return
+        if self.journal.records_since_compaction:
+            self.compact_journal()
+        self.compaction_job = self.root.after(JOURNAL_COMPACT_INTERVAL_MS, self.periodic_compaction)
+
+    def toggle_quote_server(self):
+        """Start or stop sharing prices with players."""
+        if self.quote_server is not None:
+            self.quote_server.stop()
+            self.quote_server = None
+            self.share_prices_button.config(text="Share Prices")
+            return
+        server = QuoteServer(self.pricing_engine.snapshot(), QUOTE_SERVER_HOST, DEFAULT_PORT)
+        try:
+            server.start_in_thread()
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to share prices: {e}")
+            return
+        self.quote_server = server
+        self.share_prices_button.config(text=f"Stop Sharing (port {server.port})")
+
+    def publish_quotes(self):
+        """Send the current prices to the quote server once the pending changes are done."""
+        if self.quote_server is not None and self.quote_publish_job is None:
+            self.quote_publish_job = self.root.after_idle(self.send_quotes)
+
+    def send_quotes(self):
+        self.quote_publish_job = None
+        if self.quote_server is not None:
+            self.quote_server.publish(self.pricing_engine)
+
+    def on_close(self):
+        self.task_runner.cancel()
+        self.task_runner.wait()  # Never leave a half-written file behind
+        if self.quote_server is not None:
+            self.quote_server.stop()
+        self.close_journal()
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = TradingApp(root)
+    if len(sys.argv) > 1:
+        app.open_journal(sys.argv[1])  # Replay a journal given on the command line
     root.mainloop()
@@ -0,0 +1,191 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import argparse
+import heapq
+from collections import namedtuple
+
+import numpy as np
+
+from persistence import read_configuration
+from pricing import engine_from_config
+
+# Best destinations kept per item for route legs
+ROUTE_DESTINATIONS = 8
+
+# Partial routes kept at each stop of the route search
+ROUTE_BEAM_WIDTH = 32
+
+# A player buys an item at the source island's sell price and sells it at the destination's buy price
+Trade = namedtuple("Trade", "profit item source destination cost revenue")
+Route = namedtuple("Route", "profit trades")
+
+class ArbitrageIndex:
+    """Per-item index of every island's prices for finding profitable trades.
+
+    The rows of each item are kept sorted by sell price (cheapest first) and
+    by buy price (highest first), so the best trades of an item are at the
+    front of its two lists and the top trades of all items come from a heap.
+    Prices that are not traded sort last and never make a trade.
+    """
+
+    def __init__(self, engine):
+        engine.calculate()  # Every island at the current market day
+        self.engine = engine
+        self.sell = engine.sell_prices.copy()
+        self.buy = engine.buy_prices.copy()
+        self.island_names = engine.island_names
+        self.row_islands = np.empty(len(self.sell), dtype=np.int32)
+        for island_id, island_name in enumerate(self.island_names):
+            start, end = engine.island_offsets[island_name]
+            self.row_islands[start:end] = island_id
+
+        self.item_ids = {}  # item name -> item id
+        row_items = np.array([self.item_ids.setdefault(item_name, len(self.item_ids)) for item_name in engine.item_names], dtype=np.int32)
+        self.items = list(self.item_ids)
+        self.by_sell = np.lexsort((self.sell, row_items))  # NaN sorts last
+        self.by_buy = np.lexsort((-self.buy, row_items))
+        self.item_starts = np.searchsorted(row_items[self.by_sell], np.arange(len(self.items) + 1))
+
+        # The best few destinations of each item, -1 where an item has fewer
+        count = np.diff(self.item_starts)
+        self.destinations = np.full((len(self.items), ROUTE_DESTINATIONS), -1, dtype=np.int64)
+        for rank in range(ROUTE_DESTINATIONS):
+            has_rank = count > rank
+            rows = self.by_buy[self.item_starts[:-1][has_rank] + rank]
+            self.destinations[has_rank, rank] = np.where(np.isnan(self.buy[rows]), -1, rows)
+        self.row_items = row_items
+
+    def item_rows(self, item_name):
+        """Return an item's rows sorted by sell price and by buy price."""
+        item_id = self.item_ids[item_name]
+        start, end = self.item_starts[item_id], self.item_starts[item_id + 1]
+        return self.by_sell[start:end], self.by_buy[start:end]
+
+    def trade(self, source_row, destination_row):
+        cost = float(self.sell[source_row])
+        revenue = float(self.buy[destination_row])
+        return Trade(
+            round(revenue - cost, 2),
+            self.engine.item_names[source_row],
+            self.island_names[self.row_islands[source_row]],
+            self.island_names[self.row_islands[destination_row]],
+            cost,
+            revenue,
+        )
+
+    def item_trades(self, item_name, k=10):
+        """Return the k most profitable (source, destination) trades of one item."""
+        by_sell, by_buy = self.item_rows(item_name)
+        sell, buy = self.sell[by_sell], self.buy[by_buy]
+        sell, buy = sell[~np.isnan(sell)].tolist(), buy[~np.isnan(buy)].tolist()  # Untraded prices are sorted last
+        trades = []
+        # Expand pairs of (i-th cheapest source, j-th best destination) best first
+        heap = [(sell[0] - buy[0], 0, 0)] if sell and buy else []
+        seen = {(0, 0)}
+        while heap and len(trades) < k:
+            loss, i, j = heapq.heappop(heap)
+            if loss >= 0:
+                break  # No profit left
+            if self.row_islands[by_sell[i]] != self.row_islands[by_buy[j]]:
+                trades.append(self.trade(by_sell[i], by_buy[j]))
+            for next_i, next_j in ((i + 1, j), (i, j + 1)):
+                if next_i < len(sell) and next_j < len(buy) and (next_i, next_j) not in seen:
+                    seen.add((next_i, next_j))
+                    heapq.heappush(heap, (sell[next_i] - buy[next_j], next_i, next_j))
+        return trades
+
+    def top_trades(self, k=10):
+        """Return the k most profitable trades over all items, at most one per item."""
+        best = []
+        for item_name in self.items:
+            trades = self.item_trades(item_name, 1)
+            if trades:
+                best.append(trades[0])
+        return heapq.nlargest(k, best)
+
+    def legs(self, island_name, exclude=()):
+        """Return the best trade from an island to each other island, best first.
+
+        Islands whose ids are in exclude are skipped.
+        """
+        start, end = self.engine.island_offsets[island_name]
+        if start == end:
+            return []
+        destinations = self.destinations[self.row_items[start:end]]
+        sources = np.repeat(np.arange(start, end), ROUTE_DESTINATIONS).reshape(destinations.shape)
+        valid = destinations >= 0
+        destination_islands = np.where(valid, self.row_islands[destinations], -1)
+        valid &= destination_islands != self.row_islands[start]
+        for island_id in exclude:
+            valid &= destination_islands != island_id
+
+        sources, destinations, destination_islands = sources[valid], destinations[valid], destination_islands[valid]
+        profits = self.buy[destinations] - self.sell[sources]
+        profitable = profits > 0  # False for untraded (NaN) prices
+        sources, destinations, destination_islands, profits = (
+            sources[profitable],
+            destinations[profitable],
+            destination_islands[profitable],
+            profits[profitable],
+        )
+
+        # Best trade per destination island, then best destinations first
+        order = np.lexsort((-profits, destination_islands))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = destination_islands[order][1:] != destination_islands[order][:-1]
+        best = order[first]
+        best = best[np.argsort(-profits[best], kind="stable")]
+        return [self.trade(source, destination) for source, destination in zip(sources[best].tolist(), destinations[best].tolist())]
+
+    def routes(self, start_island, stops, k=5, beam_width=ROUTE_BEAM_WIDTH):
+        """Return up to k routes of the given number of trades from an island, most profitable first.
+
+        Each trade carries one item from one island to the next, and no island
+        is visited twice. This is a beam search, so very long routes are good
+        rather than guaranteed best.
+        """
+        island_ids = {island_name: island_id for island_id, island_name in enumerate(self.island_names)}
+        beam = [Route(0.0, ())]
+        for _ in range(stops):
+            candidates = []
+            for route in beam:
+                island_name = route.trades[-1].destination if route.trades else start_island
+                visited = {island_ids[start_island]} | {island_ids[trade.destination] for trade in route.trades}
+                for trade in self.legs(island_name, visited)[:beam_width]:
+                    candidates.append(Route(round(route.profit + trade.profit, 2), route.trades + (trade,)))
+            if not candidates:
+                break
+            beam = heapq.nlargest(beam_width, candidates, key=lambda route: route.profit)
+        return [route for route in beam[:k] if route.trades]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the most profitable trades between islands.")
+    parser.add_argument("config", help="Saved configuration (JSON)")
+    parser.add_argument("--day", type=int, default=None, help="Market day (defaults to the saved market day)")
+    parser.add_argument("--item", help="Only trades of this item")
+    parser.add_argument("--route", metavar="ISLAND", help="Find routes starting at this island instead")
+    parser.add_argument("--stops", type=int, default=3, help="Trades per route")
+    parser.add_argument("--top", type=int, default=10, help="Number of trades or routes")
+    args = parser.parse_args(argv)
+
+    engine = engine_from_config(read_configuration(args.config))
+    if args.day is not None:
+        engine.set_market(market_tick=args.day)
+    index = ArbitrageIndex(engine)
+
+    if args.route:
+        if args.route not in engine.island_offsets:
+            parser.error(f"unknown island {args.route!r}")
+        for route in index.routes(args.route, args.stops, args.top):
+            print(f"Profit {route.profit}: " + " -> ".join([args.route] + [f"{trade.destination} ({trade.item})" for trade in route.trades]))
+        return
+
+    if args.item is not None and args.item not in index.item_ids:
+        parser.error(f"unknown item {args.item!r}")
+    trades = index.item_trades(args.item, args.top) if args.item else index.top_trades(args.top)
+    for trade in trades:
+        print(f"{trade.item}: buy at {trade.source} for {trade.cost}, sell at {trade.destination} for {trade.revenue} (profit {trade.profit})")
+
+if __name__ == "__main__":
+    main()
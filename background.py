@@ -0,0 +1,110 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import queue
+import threading
+
+# How often the Tk thread checks on a running job
+POLL_INTERVAL_MS = 50
+
+class TaskCancelled(Exception):
+    """Raised inside a job once it has been cancelled."""
+
+class Task:
+    """Handle a job uses to report progress and notice cancellation."""
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.messages = queue.Queue()  # (kind, value) for the Tk thread
+
+    def check(self):
+        """Raise TaskCancelled if the job has been cancelled."""
+        if self.cancelled.is_set():
+            raise TaskCancelled()
+
+    def progress(self, fraction):
+        """Report progress, a fraction or None when the total is unknown, and check for cancellation."""
+        self.check()
+        self.messages.put(("progress", fraction))
+
+class TaskRunner:
+    """Run one long job at a time on a worker thread.
+
+    Tk may only be used from its own thread, so the worker never calls back
+    into the UI; it queues messages that the Tk thread picks up with
+    root.after polling. The job's result is handed to on_done on the Tk
+    thread. A job that finishes before it notices a cancellation still
+    delivers its result.
+    """
+
+    def __init__(self, root, on_progress, on_busy_changed):
+        self.root = root
+        self.on_progress = on_progress  # (fraction or None)
+        self.on_busy_changed = on_busy_changed  # (busy) when a job starts or ends
+        self.task = None
+        self.thread = None
+        self.callbacks = None
+
+    def busy(self):
+        return self.task is not None
+
+    def run(self, work, on_done, on_error):
+        """Start work(task) on a worker thread and return False if a job is already running.
+
+        on_done(result) or on_error(exception) is called on the Tk thread when
+        it ends; neither is called if it was cancelled.
+        """
+        if self.busy():
+            return False
+        task = self.task = Task()
+
+        def worker():
+            try:
+                result = work(task)
+            except TaskCancelled:
+                task.messages.put(("cancelled", None))
+            except Exception as error:
+                task.messages.put(("error", error))
+            else:
+                task.messages.put(("done", result))
+
+        self.callbacks = (on_done, on_error)
+        self.thread = threading.Thread(target=worker, daemon=True)
+        self.thread.start()
+        self.on_busy_changed(True)
+        self.root.after(POLL_INTERVAL_MS, self.poll)
+        return True
+
+    def cancel(self):
+        """Ask the running job to stop at its next progress report."""
+        if self.task is not None:
+            self.task.cancelled.set()
+
+    def wait(self):
+        """Block until the worker thread has finished, e.g. before the app closes."""
+        if self.thread is not None:
+            self.thread.join()
+
+    def poll(self):
+        progress, reported = None, False
+        while True:
+            try:
+                kind, value = self.task.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                progress, reported = value, True
+                continue
+
+            on_done, on_error = self.callbacks
+            self.task = self.thread = self.callbacks = None
+            self.on_busy_changed(False)
+            if kind == "done":
+                on_done(value)
+            elif kind == "error":
+                on_error(value)
+            return
+
+        if reported:
+            self.on_progress(progress)  # Only the latest report is worth drawing
+        self.root.after(POLL_INTERVAL_MS, self.poll)
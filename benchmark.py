@@ -0,0 +1,238 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from persistence import read_configuration, write_configuration
+from pricing import ModifierIndex, PricingEngine
+from world import DEFAULT_CATEGORIES, QUANTITIES, ItemRow, World
+
+# Synthetic world sizes: islands, items every island has, items of each island's own and item rows
+SCALES = {
+    "small": {"islands": 10, "universal_items": 500, "island_items": 50, "rows": 100},
+    "medium": {"islands": 500, "universal_items": 1000, "island_items": 100, "rows": 1000},
+    "large": {"islands": 10000, "universal_items": 50, "island_items": 10, "rows": 5000},
+}
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# A benchmark regresses when it is this fraction slower than its baseline...
+REGRESSION_THRESHOLD = 0.5
+
+# ...and slower by more than this many seconds, so tiny timings do not flap
+REGRESSION_MIN_SECONDS = 0.01
+
+def generate_configuration(islands, universal_items, island_items, rows, seed=0):
+    """Return a random configuration in the saved configuration shape."""
+    rng = random.Random(seed)
+    categories = list(DEFAULT_CATEGORIES)
+    universal = {category: {} for category in categories}
+    for index in range(universal_items):
+        universal[rng.choice(categories)][f"Item {index}"] = rng.randint(1, 1000)
+
+    island_overrides = {}
+    for island_index in range(islands):
+        own = {category: {} for category in categories}
+        for index in range(island_items):
+            own[rng.choice(categories)][f"Local Item {island_index}-{index}"] = rng.randint(1, 1000)
+        island_overrides[f"Island {island_index}"] = own
+
+    selected_island = "Island 0"
+    island_items_of_selected = [
+        (category, item_name)
+        for category, items in {**universal, **island_overrides[selected_island]}.items()
+        for item_name in items
+    ]
+    item_entries = []
+    for _ in range(rows):
+        category, item_name = rng.choice(island_items_of_selected)
+        item_entries.append({
+            "category": category,
+            "item": item_name,
+            "sell_modifier": rng.randrange(-100, 101, 5),
+            "buy_modifier": rng.randrange(-100, 101, 5),
+            "quantity": rng.choice(QUANTITIES),
+        })
+
+    return {
+        "selected_island": selected_island,
+        "global_modifier": 0,
+        "market_seed": seed,
+        "market_tick": 0,
+        "item_entries": item_entries,
+        "universal_items": universal,
+        "islands": island_overrides,
+    }
+
+def best_time(run, setup=None, repeat=5):
+    """Return the fastest of several runs of run(setup()), in seconds, with garbage collection paused like timeit."""
+    best = float("inf")
+    for _ in range(repeat):
+        value = setup() if setup is not None else None
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run(value)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+def index_rows(engine, island_name, entries):
+    """Build item rows and push their modifiers into the engine, like the app does on load."""
+    index = ModifierIndex()
+    keys = set()
+    for row_id, entry in enumerate(entries):
+        row = ItemRow.from_dict(entry)
+        key = (island_name, row.category, row.item)
+        keys.update(index.update_row(row_id, key, row.sell_modifier, row.buy_modifier, row.quantity))
+    for key in keys:
+        engine.set_item_modifiers(*key, *index.modifiers(key))
+
+def run_benchmarks(config, repeat, gui=False):
+    """Time the pricing, persistence and item paths on a configuration and return {name: seconds}."""
+    results = {}
+    island_name = config["selected_island"]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "config.json")
+        results["save_configuration"] = best_time(lambda _: write_configuration(path, config), repeat=repeat)
+        results["load_configuration"] = best_time(lambda _: read_configuration(path), repeat=repeat)
+
+    def load_world(_=None):
+        world = World()
+        world.load_config(config)
+        return world
+
+    results["build_world"] = best_time(load_world, repeat=repeat)
+    world = load_world()
+    results["build_engine"] = best_time(lambda _: PricingEngine(world), repeat=repeat)
+    engine = PricingEngine(world)
+    results["index_rows"] = best_time(lambda _: index_rows(engine, island_name, config["item_entries"]), repeat=repeat)
+
+    # calculate_prices: the first calculation of a day, then a modifier change
+    def next_day(_=None):
+        engine.set_market(market_tick=engine.market_tick + 1)
+
+    results["calculate_island"] = best_time(lambda _: engine.calculate(island_name), next_day, repeat)
+    entry = config["item_entries"][0]
+    row = engine.row(island_name, entry["category"], entry["item"])
+
+    def change_one_item(_=None):
+        engine.set_item_modifiers(island_name, entry["category"], entry["item"], engine.sell_modifiers[row] + 1, 0)
+
+    results["reprice_one_item"] = best_time(lambda _: engine.reprice(island_name), change_one_item, repeat)
+    results["calculate_all_islands"] = best_time(lambda _: engine.calculate(), next_day, repeat)
+
+    # "Apply to all islands" and "Create New Island", updating the engine in place as the app does
+    def load_world_and_engine(_=None):
+        world = load_world()
+        return world, PricingEngine(world)
+
+    def add_to_all(prepared):
+        world, engine = prepared
+        world.add_universal_item(DEFAULT_CATEGORIES[0], "Benchmark Item", 100)
+        engine.add_universal_item(DEFAULT_CATEGORIES[0], "Benchmark Item", 100)
+
+    def add_island(prepared):
+        world, engine = prepared
+        world.add_island("Benchmark Island", DEFAULT_CATEGORIES)
+        engine.add_island("Benchmark Island", world["Benchmark Island"])
+
+    results["add_item_to_all_islands"] = best_time(add_to_all, load_world_and_engine, repeat)
+    results["add_island"] = best_time(add_island, load_world_and_engine, repeat)
+
+    if gui:
+        results.update(run_gui_benchmarks(config, engine, repeat))
+    return results
+
+def run_gui_benchmarks(config, engine, repeat):
+    """Time the Tk paths; needs a display, e.g. run under xvfb-run."""
+    import tkinter as tk  # Only imported here so the other benchmarks run without a display
+
+    from item_grid import ItemModifierGrid
+    from results_view import ResultsRenderer
+
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        grid = ItemModifierGrid(root, lambda query="": [], lambda category, query="": [], lambda *args: True, lambda row_id: None)
+        results = {
+            "grid_add_rows": best_time(
+                lambda _: (grid.add_rows(config["item_entries"]), root.update_idletasks()), lambda _=None: grid.clear(), repeat
+            )
+        }
+
+        text = tk.Text(root)
+        renderer = ResultsRenderer(text)
+        island_name = config["selected_island"]
+        _, sell, buy = engine.calculate(island_name)
+        start, _ = engine.island_offsets[island_name]
+        keyed_lines = [
+            (start + row, f"{engine.item_names[start + row]} - Sell Price: {sell_price}, Buy Price: {buy_price}")
+            for row, (sell_price, buy_price) in enumerate(zip(sell.tolist(), buy.tolist()))
+        ]
+        results["render_results"] = best_time(
+            lambda _: (renderer.set_lines(keyed_lines), root.update_idletasks()), repeat=repeat
+        )
+        return results
+    finally:
+        root.destroy()
+
+def compare(results, baseline, threshold):
+    """Return (scale, name, seconds, baseline seconds) for every benchmark that regressed."""
+    regressions = []
+    for scale, timings in results.items():
+        for name, seconds in timings.items():
+            expected = baseline.get(scale, {}).get(name)
+            if expected is not None and seconds > expected * (1 + threshold) and seconds - expected > REGRESSION_MIN_SECONDS:
+                regressions.append((scale, name, seconds, expected))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time pricing and persistence on synthetic worlds and compare with a baseline.")
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=["small", "medium"], help="World sizes to run")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark; the fastest counts")
+    parser.add_argument("--gui", action="store_true", help="Also time the Tk paths (needs a display, e.g. xvfb-run)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline timings (JSON)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these timings as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Allowed slowdown as a fraction")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+
+    results = {}
+    for scale in args.scale:
+        config = generate_configuration(**SCALES[scale])
+        results[scale] = run_benchmarks(config, args.repeat, args.gui)
+        for name, seconds in results[scale].items():
+            expected = baseline.get(scale, {}).get(name)
+            change = f"  ({seconds / expected - 1:+.0%} vs baseline)" if expected else ""
+            print(f"{scale:8} {name:26} {seconds * 1000:10.2f} ms{change}")
+
+    if args.save_baseline:
+        for scale, timings in results.items():
+            baseline.setdefault(scale, {}).update(timings)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=4, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    for scale, name, seconds, expected in regressions:
+        print(f"REGRESSION {scale} {name}: {seconds * 1000:.2f} ms, baseline {expected * 1000:.2f} ms", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Set to 1 to start with instrumentation enabled
+DIAGNOSTICS_ENV = "DND_TRADING_DIAGNOSTICS"
+
+# Fields of one operation's statistics, in display order
+STAT_FIELDS = ("calls", "total_seconds", "max_seconds", "allocated_bytes", "tcl_commands")
+
+class Instruments:
+    """Opt-in counters, latencies, allocations and Tcl command counts per operation.
+
+    While disabled, instrumented functions only check one flag. While enabled,
+    tracemalloc traces allocations and Tcl's "info cmdcount" counts the Tcl
+    commands run on the Tk thread.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.tcl = None  # Tk interpreter (root.tk) to count commands of
+        self.stats = {}  # operation -> [calls, total seconds, max seconds, allocated bytes, Tcl commands]
+        self.lock = threading.Lock()
+
+    def enable(self):
+        if not self.enabled:
+            tracemalloc.start()
+            self.enabled = True
+
+    def disable(self):
+        if self.enabled:
+            self.enabled = False
+            tracemalloc.stop()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+
+    def tcl_command_count(self):
+        """Return Tcl's command counter, or 0 off the Tk thread, where Tk must not be called."""
+        if self.tcl is None or threading.current_thread() is not threading.main_thread():
+            return 0
+        return int(self.tcl.call("info", "cmdcount"))
+
+    @contextmanager
+    def record(self, name):
+        """Record one call of an operation."""
+        commands = self.tcl_command_count()
+        allocated = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            allocated = tracemalloc.get_traced_memory()[0] - allocated if tracemalloc.is_tracing() else 0
+            commands = self.tcl_command_count() - commands
+            with self.lock:
+                stat = self.stats.setdefault(name, [0, 0.0, 0.0, 0, 0])
+                stat[0] += 1
+                stat[1] += elapsed
+                stat[2] = max(stat[2], elapsed)
+                stat[3] += max(allocated, 0)
+                stat[4] += commands
+
+    def wrap(self, name, function):
+        """Return function, recording every call as the given operation."""
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return function(*args, **kwargs)
+            with self.record(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def report(self):
+        """Return {operation: {field: value}} of everything recorded so far."""
+        with self.lock:
+            return {name: dict(zip(STAT_FIELDS, stat)) for name, stat in sorted(self.stats.items())}
+
+    def export(self, file_path):
+        """Write the report to a JSON file."""
+        with open(file_path, "w") as file:
+            json.dump({"enabled": self.enabled, "operations": self.report()}, file, indent=4)
+
+# Shared by the whole app
+instruments = Instruments()
+if os.environ.get(DIAGNOSTICS_ENV) == "1":
+    instruments.enable()
+
+def instrumented(name):
+    """Decorator recording every call of a function as an operation of the shared instruments."""
+    return lambda function: instruments.wrap(name, function)
@@ -0,0 +1,84 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from diagnostics import instruments
+
+# How often an open diagnostics window refreshes itself
+REFRESH_INTERVAL_MS = 1000
+
+# Column id, heading and width of each diagnostics column
+COLUMNS = [
+    ("operation", "Operation", 200),
+    ("calls", "Calls", 60),
+    ("total_ms", "Total (ms)", 90),
+    ("mean_ms", "Mean (ms)", 90),
+    ("max_ms", "Max (ms)", 90),
+    ("allocated_kib", "Allocated (KiB)", 110),
+    ("tcl_commands", "Tcl Commands", 100),
+]
+
+class DiagnosticsWindow:
+    """Window showing the shared instruments' statistics, with controls to enable, reset and export them."""
+
+    def __init__(self, root):
+        self.window = tk.Toplevel(root)
+        self.window.title("Diagnostics")
+        self.enabled = tk.BooleanVar(value=instruments.enabled)
+
+        controls = ttk.Frame(self.window)
+        controls.pack(fill="x", padx=10, pady=5)
+        ttk.Checkbutton(controls, text="Record", variable=self.enabled, command=self.toggle).pack(side="left")
+        ttk.Button(controls, text="Reset", command=self.reset).pack(side="left", padx=5)
+        ttk.Button(controls, text="Export", command=self.export).pack(side="left")
+
+        self.tree = ttk.Treeview(self.window, columns=[column for column, _, _ in COLUMNS], show="headings", height=12)
+        for column, heading, width in COLUMNS:
+            self.tree.heading(column, text=heading, anchor="w")
+            self.tree.column(column, width=width, anchor="w")
+        self.tree.pack(fill="both", expand=True, padx=10, pady=5)
+
+        self.refresh()
+
+    def toggle(self):
+        if self.enabled.get():
+            instruments.enable()
+        else:
+            instruments.disable()
+
+    def reset(self):
+        instruments.reset()
+        self.refresh(schedule=False)
+
+    def export(self):
+        file_path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".json",
+            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+            title="Export Diagnostics",
+        )
+        if file_path:
+            try:
+                instruments.export(file_path)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to export diagnostics: {e}", parent=self.window)
+
+    def refresh(self, schedule=True):
+        """Redraw the statistics, and keep refreshing while the window is open."""
+        if not self.window.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        for name, stat in instruments.report().items():
+            self.tree.insert("", "end", values=(
+                name,
+                stat["calls"],
+                f"{stat['total_seconds'] * 1000:.2f}",
+                f"{stat['total_seconds'] * 1000 / stat['calls']:.2f}",
+                f"{stat['max_seconds'] * 1000:.2f}",
+                f"{stat['allocated_bytes'] / 1024:.1f}",
+                stat["tcl_commands"],
+            ))
+        if schedule:
+            self.window.after(REFRESH_INTERVAL_MS, self.refresh)
@@ -0,0 +1,176 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import itertools
+import tkinter as tk
+from tkinter import ttk
+
+from world import QUANTITIES, ItemRow
+
+# Column id, heading and width of each grid column
+COLUMNS = [
+    ("category", "Category", 220),
+    ("item", "Item", 160),
+    ("sell_modifier", "Sell Modifier (%)", 110),
+    ("buy_modifier", "Buy Modifier (%)", 110),
+    ("quantity", "Quantity", 90),
+]
+
+class ItemModifierGrid:
+    """Virtualized table of item rows built on a ttk.Treeview.
+
+    Rows are plain Treeview items, so Tk only draws the visible ones and adding
+    or removing a row never touches the others. A single editor widget is
+    placed over a cell while it is being edited. Category and item editors
+    filter their dropdown as the user types.
+    """
+
+    def __init__(self, parent, get_categories, get_items, has_value, on_change, height=8):
+        self.get_categories = get_categories  # (query) -> matching category names of the selected island
+        self.get_items = get_items  # (category, query) -> matching item names, from every category if category is ""
+        self.has_value = has_value  # (column, row, value) -> whether value is a known category or item
+        self.on_change = on_change  # (row_id) called after a cell was edited
+        self.rows = {}  # row id -> ItemRow, in display order
+        self.row_ids = itertools.count()
+        self.editor = None
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(
+            self.frame, columns=[column for column, _, _ in COLUMNS], show="headings", height=height, selectmode="extended"
+        )
+        for column, heading, width in COLUMNS:
+            self.tree.heading(column, text=heading, anchor="w")
+            self.tree.column(column, width=width, anchor="w", stretch=False)
+
+        scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=lambda first, last: self.on_scroll(scrollbar, first, last))
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self.tree.bind("<Button-1>", lambda event: self.close_editor())
+        self.tree.bind("<Double-1>", self.on_double_click)
+        self.tree.bind("<Return>", self.on_return)
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def add_row(self, values=None):
+        """Append one row and return its id."""
+        return self.add_rows([values or {}])[0]
+
+    def add_rows(self, values_list):
+        """Append many rows, given as saved item entries, and return their ids."""
+        self.close_editor(commit=False)
+        row_ids = []
+        insert = self.tree.insert
+        for values in values_list:
+            row_id = str(next(self.row_ids))
+            row = ItemRow.from_dict(values)
+            self.rows[row_id] = row
+            insert("", "end", iid=row_id, values=self.display_values(row))
+            row_ids.append(row_id)
+        return row_ids
+
+    def remove_row(self, row_id):
+        """Remove one row."""
+        self.close_editor(commit=False)
+        if self.rows.pop(row_id, None) is not None:
+            self.tree.delete(row_id)
+
+    def clear(self):
+        """Remove every row."""
+        self.close_editor(commit=False)
+        self.tree.delete(*self.rows)
+        self.rows = {}
+
+    def selected_rows(self):
+        """Return the ids of the selected rows."""
+        return list(self.tree.selection())
+
+    def set_value(self, row_id, column, value):
+        """Change one cell and redraw its row."""
+        setattr(self.rows[row_id], column, value)
+        self.tree.item(row_id, values=self.display_values(self.rows[row_id]))
+
+    def display_values(self, row):
+        return [getattr(row, column) for column, _, _ in COLUMNS]
+
+    def on_double_click(self, event):
+        row_id = self.tree.identify_row(event.y)
+        column = self.tree.identify_column(event.x)
+        if row_id and column:
+            self.open_editor(row_id, COLUMNS[int(column[1:]) - 1][0])
+
+    def on_return(self, event):
+        row_id = self.tree.focus()
+        if row_id:
+            self.open_editor(row_id, "category")
+
+    def on_scroll(self, scrollbar, first, last):
+        scrollbar.set(first, last)
+        self.close_editor()  # The edited cell may have scrolled away
+
+    def open_editor(self, row_id, column):
+        """Place an editor over one cell."""
+        self.close_editor()
+        bbox = self.tree.bbox(row_id, column)
+        if not bbox:
+            return  # Cell is not visible
+        row = self.rows[row_id]
+        var = tk.StringVar(value=str(getattr(row, column)))
+
+        if column in ("sell_modifier", "buy_modifier"):
+            editor = ttk.Spinbox(self.tree, from_=-100, to=100, increment=5, textvariable=var)
+            editor.bind("<FocusOut>", lambda event: self.close_editor())
+        elif column == "quantity":
+            # No FocusOut here: opening the dropdown list takes the focus
+            editor = ttk.Combobox(self.tree, textvariable=var, values=list(QUANTITIES), state="readonly")
+            editor.bind("<<ComboboxSelected>>", lambda event: self.close_editor())
+        else:
+            # Only the matches of what has been typed are loaded into the dropdown
+            if column == "category":
+                search = self.get_categories
+            else:
+                search = lambda query: self.get_items(row.category, query)
+            editor = ttk.Combobox(self.tree, textvariable=var, values=search(""))
+            editor.bind("<KeyRelease>", lambda event: self.filter_editor(event, search))
+            editor.bind("<<ComboboxSelected>>", lambda event: self.close_editor())
+
+        editor.bind("<Return>", lambda event: self.close_editor())
+        editor.bind("<Escape>", lambda event: self.close_editor(commit=False))
+        x, y, width, height = bbox
+        editor.place(x=x, y=y, width=width, height=height)
+        editor.focus_set()
+        self.editor = (editor, var, row_id, column)
+
+    def filter_editor(self, event, search):
+        """Show only the names matching the editor's text in its dropdown."""
+        if event.keysym in ("Return", "Escape", "Up", "Down", "Tab"):
+            return
+        editor, var, _, _ = self.editor
+        editor["values"] = search(var.get())
+
+    def close_editor(self, commit=True):
+        """Remove the cell editor, storing its value unless commit is False."""
+        if self.editor is None:
+            return
+        editor, var, row_id, column = self.editor
+        self.editor = None
+        editor.destroy()
+        if not commit or row_id not in self.rows:
+            return
+
+        value = var.get()
+        if column in ("sell_modifier", "buy_modifier"):
+            try:
+                value = max(-100, min(100, int(value)))
+            except ValueError:
+                return
+        elif column in ("category", "item") and value and not self.has_value(column, self.rows[row_id], value):
+            return  # Typed text that is not a category or item of the island
+        if value == getattr(self.rows[row_id], column):
+            return
+        self.set_value(row_id, column, value)
+        if column == "category":
+            self.set_value(row_id, "item", "")  # Item belonged to the old category
+        self.on_change(row_id)
@@ -0,0 +1,280 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import json
+import os
+import shutil
+import threading
+
+from diagnostics import instrumented
+from world import World
+
+# Bytes read from the configuration file at a time
+CHUNK_SIZE = 1 << 16
+
+# Characters that can follow a complete JSON value
+DELIMITERS = ",:]} \t\r\n"
+
+class JsonStream:
+    """Read JSON values from a text file a chunk at a time."""
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.base_chunk_size = chunk_size
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+        self.chars_read = 0
+
+    def fill(self):
+        """Read the next chunk, dropping the part of the buffer already parsed."""
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.chars_read += len(chunk)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of configuration file")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in configuration file")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A value not followed by a delimiter may be cut short (e.g. a number)
+                if (end < len(self.buffer) and self.buffer[end] in DELIMITERS) or self.eof:
+                    self.pos = end
+                    self.chunk_size = self.base_chunk_size
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.chunk_size *= 2  # Large values need fewer retries
+            self.fill()
+
+    def members(self):
+        """Yield the keys of an object, leaving the stream at each key's value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("}")
+                return
+
+    def elements(self):
+        """Yield once per array element, leaving the stream at the element."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("]")
+                return
+
+def iter_configuration(stream):
+    """Parse a saved configuration from a JsonStream incrementally.
+
+    Yields ("island", (name, categories)) per island, ("item_entry", entry)
+    per item row and (key, value) for every other top-level key.
+    """
+    for key in stream.members():
+        if key == "islands" and stream.peek() == "{":
+            for island_name in stream.members():
+                yield "island", (island_name, stream.value())
+        elif key == "item_entries" and stream.peek() == "[":
+            for _ in stream.elements():
+                yield "item_entry", stream.value()
+        else:
+            yield key, stream.value()
+
+@instrumented("read_configuration")
+def read_configuration(file_path, progress=None, chunk_size=CHUNK_SIZE):
+    """Stream a configuration file into a dict, calling progress(fraction) as it goes."""
+    config = {"islands": {}, "item_entries": []}
+    total = os.path.getsize(file_path) or 1
+    with open(file_path, "r") as file:
+        stream = JsonStream(file, chunk_size)
+        for count, (key, value) in enumerate(iter_configuration(stream)):
+            if key == "island":
+                island_name, categories = value
+                config["islands"][island_name] = categories
+            elif key == "item_entry":
+                config["item_entries"].append(value)
+            else:
+                config[key] = value
+            if progress is not None and count % 100 == 0:
+                progress(min(stream.chars_read / total, 1.0))
+    if progress is not None:
+        progress(1.0)
+    return config
+
+@instrumented("write_configuration")
+def write_configuration(file_path, config, progress=None):
+    """Write a configuration file, calling progress(None) as it goes.
+
+    The file is written to a temporary file first, so an error or a
+    cancellation raised by progress leaves the old file untouched.
+    """
+    temp_path = file_path + ".tmp"
+    try:
+        with open(temp_path, "w") as file:
+            for count, chunk in enumerate(json.JSONEncoder(indent=4).iterencode(config)):
+                file.write(chunk)
+                if progress is not None and count % 10000 == 0:
+                    progress(None)  # The final size is not known in advance
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def apply_record(world, config, rows, record):
+    """Apply one journal record to a World, the other configuration values and the {row id: entry} rows.
+
+    Records only ever set or remove values, so applying one twice is harmless.
+    """
+    op = record["op"]
+    if op == "island_created":
+        if record["island"] not in world:
+            world.add_island(record["island"], record["categories"])
+    elif op == "item_added":
+        if record.get("all_islands"):
+            world.add_universal_item(record["category"], record["item"], record["price"])
+        else:
+            world.add_item(record["island"], record["category"], record["item"], record["price"])
+    elif op == "row_changed":
+        rows[record["row"]] = record["values"]
+    elif op == "row_removed":
+        rows.pop(record["row"], None)
+    elif op in ("selected_island", "global_modifier", "market_tick"):
+        config[op] = record["value"]
+    else:
+        raise ValueError(f"Unknown journal record {op!r}")
+
+class Journal:
+    """Journaled persistence: a snapshot file plus an append-only log of changes.
+
+    Every change is appended to "<snapshot>.journal" as one JSON line. compact()
+    folds the log into a new snapshot on a background thread; the log is
+    rotated to "<snapshot>.journal.compacting" first so appends never wait.
+    """
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self.compacting_path = snapshot_path + ".journal.compacting"
+        self.records_since_compaction = 0
+        self.compaction_thread = None
+        self.file = open(self.journal_path, "a")
+        if self.file.tell() > 0:
+            self.file.write("\n")  # Never glue new records onto a line cut short by a crash
+
+    @instrumented("Journal.replay")
+    def replay(self, progress=None):
+        """Rebuild the latest configuration from the snapshot and the logs."""
+        if os.path.exists(self.snapshot_path):
+            config = read_configuration(self.snapshot_path, progress)
+        else:
+            config = {"islands": {}, "item_entries": []}
+        world = World()
+        world.load_config(config)
+        entries = config.pop("item_entries", [])
+        rows = dict(zip(config.pop("row_ids", map(str, range(len(entries)))), entries))
+
+        for path in (self.compacting_path, self.journal_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "r") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Record cut short by a crash
+                    apply_record(world, config, rows, record)
+                    self.records_since_compaction += 1
+
+        config.update(world.to_config())
+        config["row_ids"] = list(rows)
+        config["item_entries"] = list(rows.values())
+        return config
+
+    def append(self, op, **fields):
+        """Append one change record."""
+        fields["op"] = op
+        self.file.write(json.dumps(fields, separators=(",", ":")) + "\n")
+        self.file.flush()
+        self.records_since_compaction += 1
+
+    def is_compacting(self):
+        return self.compaction_thread is not None and self.compaction_thread.is_alive()
+
+    @instrumented("Journal.compact")
+    def compact(self, config, wait=False):
+        """Write config as the new snapshot in the background and drop the log it covers.
+
+        config is encoded on the compaction thread, so it must be a copy that
+        nothing changes any more. If a compaction is still running, returns
+        False, or with wait waits for it first, e.g. when the whole world was
+        replaced and the change is not in the log.
+        """
+        if self.is_compacting():
+            if not wait:
+                return False
+            self.compaction_thread.join()
+        self.file.close()
+        if os.path.exists(self.compacting_path):
+            # Left over from a compaction that never finished; keep its records
+            with open(self.journal_path, "r") as journal, open(self.compacting_path, "a") as compacting:
+                shutil.copyfileobj(journal, compacting)
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.compacting_path)
+        self.file = open(self.journal_path, "a")
+        self.records_since_compaction = 0
+        self.compaction_thread = threading.Thread(target=self.write_snapshot, args=(config,))
+        self.compaction_thread.start()
+        return True
+
+    def write_snapshot(self, config):
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(config, file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        os.remove(self.compacting_path)
+
+    def close(self):
+        if self.compaction_thread is not None:
+            self.compaction_thread.join()
+        self.file.close()
@@ -0,0 +1,269 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from pricing import price_text
+
+# One append-only file per column; record i is element i of every column
+COLUMNS = (
+    ("tick", np.uint32),
+    ("island", np.uint32),
+    ("item", np.uint32),
+    ("sell", np.float64),  # NaN when not traded
+    ("buy", np.float64),
+)
+
+NAMES_FILE = "names.json"
+
+# (tick, first record) of every run of consecutive records of one tick, as uint64 pairs
+RUNS_FILE = "runs.bin"
+
+# Latest market day the tick column can hold
+MAX_TICK = int(np.iinfo(np.uint32).max)
+
+class PriceHistory:
+    """Append-only, memory-mapped columnar store of calculated prices.
+
+    The store is a directory with one fixed-width binary file per column, a
+    small JSON file naming the island ids and the (category, item) of each
+    item id, and a small file of where each tick's run of records starts.
+    Queries memory-map the columns instead of reading them, so a tick range
+    is a zero-copy slice when ticks were appended in order (found by binary
+    search), and only the pages of that range are ever read. Once a day was
+    recorded out of order, a range is gathered from the runs of the ticks in
+    it instead.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.island_ids = {}  # island name -> id
+        self.item_ids = {}  # (category, item name) -> id
+        self.item_name_ids = {}  # item name -> ids of the item in every category
+        names_path = os.path.join(path, NAMES_FILE)
+        if os.path.exists(names_path):
+            with open(names_path, "r") as file:
+                names = json.load(file)
+            self.island_ids = {name: index for index, name in enumerate(names["islands"])}
+            for index, (category, item_name) in enumerate(names["items"]):
+                self.item_ids[category, item_name] = index
+                self.item_name_ids.setdefault(item_name, []).append(index)
+
+        # Drop records cut short by a crash so the columns line up again
+        self.count = None
+        for column, dtype in COLUMNS:
+            with open(self.column_path(column), "ab") as file:
+                count = file.tell() // np.dtype(dtype).itemsize
+            self.count = count if self.count is None else min(self.count, count)
+        for column, dtype in COLUMNS:
+            with open(self.column_path(column), "ab") as file:
+                file.truncate(self.count * np.dtype(dtype).itemsize)
+
+        self.maps = {}  # column -> memmap, remapped after appends
+        self.island_layouts = {}  # island -> (categories, item names, item ids) last appended
+
+        # Runs of consecutive records of one tick, to find tick ranges without a full scan
+        runs_path = os.path.join(path, RUNS_FILE)
+        if os.path.exists(runs_path):
+            runs = np.fromfile(runs_path, dtype=np.uint64)
+            runs = runs[:len(runs) // 2 * 2].reshape(-1, 2)
+            runs = runs[runs[:, 1] < self.count]  # Runs whose records a crash cut off
+            with open(runs_path, "ab") as file:
+                file.truncate(runs.nbytes)
+        else:
+            # Written before runs were stored; scan the ticks once
+            ticks = self.column("tick")
+            starts = np.concatenate(([0], np.flatnonzero(ticks[1:] != ticks[:-1]) + 1)) if self.count else []
+            runs = np.column_stack((ticks[starts], starts)).astype(np.uint64) if self.count else np.empty((0, 2), np.uint64)
+            runs.tofile(runs_path)
+        self.run_ticks = runs[:, 0].tolist()
+        self.run_starts = runs[:, 1].tolist()
+        self.runs = None  # (ticks, starts, ends) arrays of the runs, rebuilt after appends
+        self.last_tick = max(self.run_ticks) if self.run_ticks else None
+        self.ticks_sorted = self.run_ticks == sorted(self.run_ticks)
+
+    def column_path(self, column):
+        return os.path.join(self.path, column + ".bin")
+
+    def column(self, column):
+        """Return a read-only memory map of a whole column."""
+        mapped = self.maps.get(column)
+        if mapped is None or len(mapped) != self.count:
+            dtype = dict(COLUMNS)[column]
+            if self.count == 0:
+                mapped = np.empty(0, dtype=dtype)
+            else:
+                mapped = np.memmap(self.column_path(column), dtype=dtype, mode="r", shape=(self.count,))
+            self.maps[column] = mapped
+        return mapped
+
+    def name_ids(self, ids, names):
+        """Return the ids of names (or keys), adding new ones, and whether any were new."""
+        added = False
+        result = np.empty(len(names), dtype=np.uint32)
+        for index, name in enumerate(names):
+            name_id = ids.get(name)
+            if name_id is None:
+                name_id = ids[name] = len(ids)
+                added = True
+            result[index] = name_id
+        return result, added
+
+    def save_names(self):
+        temp_path = os.path.join(self.path, NAMES_FILE + ".tmp")
+        with open(temp_path, "w") as file:
+            json.dump({"islands": list(self.island_ids), "items": list(self.item_ids)}, file)
+        os.replace(temp_path, os.path.join(self.path, NAMES_FILE))
+
+    def append(self, tick, island_name, categories, item_names, sell, buy):
+        """Append the prices of one island's items, given with their categories, in one tick."""
+        if not 0 <= tick <= MAX_TICK:
+            raise ValueError(f"Market day {tick} is not between 0 and {MAX_TICK}")
+        island_ids, new_island = self.name_ids(self.island_ids, [island_name])
+        layout = self.island_layouts.get(island_name)
+        if layout is not None and layout[0] == categories and layout[1] == item_names:
+            item_ids, new_items = layout[2], False  # Same items as last time, the usual case
+        else:
+            item_ids, new_items = self.name_ids(self.item_ids, list(zip(categories, item_names)))
+            self.island_layouts[island_name] = (list(categories), list(item_names), item_ids)
+        if new_items:
+            self.item_name_ids = {}
+            for (_, item_name), item_id in self.item_ids.items():
+                self.item_name_ids.setdefault(item_name, []).append(item_id)
+        if new_island or new_items:
+            self.save_names()  # Names first, so every stored id has a name
+
+        count = len(item_names)
+        values = {
+            "tick": np.full(count, tick, dtype=np.uint32),
+            "island": np.full(count, island_ids[0], dtype=np.uint32),
+            "item": item_ids,
+            "sell": np.asarray(sell, dtype=np.float64),
+            "buy": np.asarray(buy, dtype=np.float64),
+        }
+        if not self.run_ticks or self.run_ticks[-1] != tick:
+            # The run first, so every stored record belongs to a stored run
+            with open(os.path.join(self.path, RUNS_FILE), "ab") as file:
+                file.write(np.array([tick, self.count], dtype=np.uint64).tobytes())
+            self.run_ticks.append(tick)
+            self.run_starts.append(self.count)
+        for column, dtype in COLUMNS:
+            with open(self.column_path(column), "ab") as file:
+                file.write(values[column].astype(dtype, copy=False).tobytes())
+        self.runs = None
+        if self.last_tick is not None and tick < self.last_tick:
+            self.ticks_sorted = False  # Tick ranges are gathered from runs from now on
+        self.count += count
+        self.last_tick = tick if self.last_tick is None else max(self.last_tick, tick)
+
+    def tick_range(self, start_tick=None, end_tick=None):
+        """Return the records with start_tick <= tick < end_tick as {column: array}.
+
+        With ticks appended in order these are zero-copy slices of the maps.
+        """
+        start_tick = 0 if start_tick is None else max(start_tick, 0)
+        end_tick = MAX_TICK + 1 if end_tick is None else max(end_tick, 0)
+        if self.ticks_sorted:
+            ticks = self.column("tick")
+            rows = slice(np.searchsorted(ticks, start_tick, "left"), np.searchsorted(ticks, end_tick, "left"))
+        else:
+            if self.runs is None:
+                starts = np.array(self.run_starts, dtype=np.int64)
+                self.runs = (np.array(self.run_ticks, dtype=np.int64), starts, np.append(starts[1:], self.count))
+            run_ticks, run_starts, run_ends = self.runs
+            selected = (run_ticks >= start_tick) & (run_ticks < end_tick)
+            starts, lengths = run_starts[selected], (run_ends - run_starts)[selected]
+            # Record numbers of every selected run: each run's start plus 0, 1, ... its length
+            rows = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        return {column: self.column(column)[rows] for column, _ in COLUMNS}
+
+    def last_ticks(self, count):
+        """Return the (start, end) tick range of the last count ticks recorded."""
+        end_tick = (self.last_tick or 0) + 1
+        return max(end_tick - count, 0), end_tick
+
+    def select(self, island_name=None, item_name=None, start_tick=None, end_tick=None, category=None):
+        """Return the records of an island and/or item in a tick range as {column: array}.
+
+        An item is matched in every category unless one is given. Unknown
+        islands or items give empty arrays.
+        """
+        records = self.tick_range(start_tick, end_tick)
+        mask = None
+        if island_name is not None:
+            mask = records["island"] == self.island_ids.get(island_name, -1)
+        if item_name is not None:
+            if category is not None:
+                item_ids = [self.item_ids[category, item_name]] if (category, item_name) in self.item_ids else []
+            else:
+                item_ids = self.item_name_ids.get(item_name, [])
+            matches = np.isin(records["item"], item_ids)
+            mask = matches if mask is None else mask & matches
+        if mask is None:
+            return records
+        return {column: values[mask] for column, values in records.items()}
+
+    def series(self, island_name, item_name, start_tick=None, end_tick=None, category=None):
+        """Return (ticks, sell, buy) of one item on one island; the latest record of a tick wins."""
+        records = self.select(island_name, item_name, start_tick, end_tick, category)
+        ticks = records["tick"]
+        # Keep the last record per tick (a tick may have been recalculated after a modifier change)
+        order = np.argsort(ticks, kind="stable")[::-1]
+        unique_ticks, first = np.unique(ticks[order], return_index=True)
+        rows = order[first]
+        return unique_ticks, records["sell"][rows], records["buy"][rows]
+
+    def aggregate(self, island_name=None, item_name=None, start_tick=None, end_tick=None, category=None):
+        """Return the count and the min, mean and max sell and buy prices of the selected records.
+
+        Prices that were not traded are left out; a side never traded gives NaN.
+        """
+        records = self.select(island_name, item_name, start_tick, end_tick, category)
+        result = {"records": len(records["tick"])}
+        for side in ("sell", "buy"):
+            prices = records[side]
+            prices = prices[~np.isnan(prices)]
+            for name, function in (("min", np.min), ("mean", np.mean), ("max", np.max)):
+                result[f"{side}_{name}"] = round(float(function(prices)), 2) if len(prices) else float("nan")
+        return result
+
+    def daily_means(self, item_name, island_name=None, start_tick=None, end_tick=None, category=None):
+        """Return (ticks, mean sell, mean buy) of an item per tick, over one or every island."""
+        records = self.select(island_name, item_name, start_tick, end_tick, category)
+        ticks, groups = np.unique(records["tick"], return_inverse=True)
+        means = []
+        for side in ("sell", "buy"):
+            prices = records[side]
+            traded = ~np.isnan(prices)
+            totals = np.bincount(groups[traded], weights=prices[traded], minlength=len(ticks))
+            counts = np.bincount(groups[traded], minlength=len(ticks))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means.append(np.round(totals / counts, 2))
+        return ticks, means[0], means[1]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the recorded price history of an item.")
+    parser.add_argument("history", help="Price history directory")
+    parser.add_argument("--item", required=True, help="Item name")
+    parser.add_argument("--category", help="Category of the item (defaults to every category)")
+    parser.add_argument("--island", help="Island name (defaults to the mean over every island)")
+    parser.add_argument("--last", type=int, default=100, help="Number of most recent ticks")
+    args = parser.parse_args(argv)
+
+    history = PriceHistory(args.history)
+    start_tick, end_tick = history.last_ticks(args.last)
+    if args.island:
+        ticks, sell, buy = history.series(args.island, args.item, start_tick, end_tick, args.category)
+    else:
+        ticks, sell, buy = history.daily_means(args.item, None, start_tick, end_tick, args.category)
+    for tick, sell_price, buy_price in zip(ticks.tolist(), sell.tolist(), buy.tolist()):
+        print(f"Day {tick}: Sell Price: {price_text(sell_price)}, Buy Price: {price_text(buy_price)}")
+    print(history.aggregate(args.island, args.item, start_tick, end_tick, args.category))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import copy
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+from diagnostics import instrumented
+from pricing_rules import FLUCTUATION_RANGE, PricingPipeline
+from world import DEFAULT_QUANTITY, CategoryTable, World
+
+# Fluctuated island price tables kept per (island, seed, tick)
+FLUCTUATION_CACHE_SIZE = 256
+
+def item_key(island_name, item_name):
+    """Return a stable 64-bit key for an item on an island."""
+    digest = hashlib.blake2b(f"{island_name}\0{item_name}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+def mix64(values):
+    """SplitMix64 finalizer over a uint64 array."""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def tick_fluctuations(item_keys, seed, tick, spread=FLUCTUATION_RANGE):
+    """Return the fluctuation of each item key in a market tick, in [-spread, spread).
+
+    The same (seed, island, item, tick) always gives the same fluctuation, so a
+    tick can be recomputed at any time instead of being stored.
+    """
+    tick_key = mix64(np.array([((seed & 0xFFFFFFFF) << 32) | (tick & 0xFFFFFFFF)], dtype=np.uint64))
+    bits = mix64(item_keys ^ tick_key)
+    uniform = (bits >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+    return (2 * uniform - 1) * spread
+
+def price_text(price):
+    """Format a price for display; NaN means the item is not traded that way."""
+    return "Not traded" if price != price else str(price)
+
+def price_value(price):
+    """Return a price for CSV or JSON output, None when it is not traded."""
+    return None if price != price else price
+
+class PricingEngine:
+    """Headless pricing engine that prices every item of every island in one batched pass.
+
+    Items are stored as one row each, grouped by island, so an island is a
+    contiguous slice of the base price and modifier arrays. Changing a modifier
+    only marks the affected rows dirty; reprice() then recomputes just those rows.
+
+    Fluctuations are a deterministic function of the market seed, the island,
+    the item and the market tick, and recently used island tables are cached.
+    Modifiers and quantities are applied by a compiled PricingPipeline.
+    """
+
+    def __init__(self, islands=None, market_seed=0, pipeline=None):
+        self.pipeline = pipeline or PricingPipeline()
+        self.global_modifier = 0
+        self.market_seed = market_seed
+        self.market_tick = 0
+        self.fluctuation_cache = OrderedDict()  # (island, seed, tick) -> fluctuated prices
+        self.load_islands(islands or {})
+
+    @instrumented("PricingEngine.load_islands")
+    def load_islands(self, islands):
+        """Rebuild the price arrays from an islands[island][category][item] dict.
+
+        Modifiers and fluctuated prices of items that still exist are kept.
+        """
+        old_offsets = getattr(self, "island_offsets", {})
+        old_item_rows = getattr(self, "island_item_rows", {})
+        self.island_names = []
+        self.island_categories = {}  # island -> category names in display order
+        self.island_offsets = {}  # island -> (first row, end row)
+        self.island_item_rows = {}  # island -> {(category, item): row within the island}
+        self.categories = CategoryTable()
+        category_ids = []  # Category id per row
+        self.item_names = []
+        base_prices = []
+        item_keys = []
+        kept_rows, old_rows = [], []
+
+        for island_name, categories in islands.items():
+            start = len(base_prices)
+            old_start = old_offsets[island_name][0] if island_name in old_offsets else 0
+            old_rows_of_island = old_item_rows.get(island_name, {})
+            item_rows = self.island_item_rows[island_name] = {}
+            self.island_names.append(island_name)
+            self.island_categories[island_name] = list(categories.keys())
+            for category, items in categories.items():
+                for item_name, base_price in items.items():
+                    key = (category, item_name)
+                    old_row = old_rows_of_island.get(key)
+                    if old_row is not None:
+                        kept_rows.append(len(base_prices))
+                        old_rows.append(old_start + old_row)
+                    item_rows[key] = len(base_prices) - start
+                    category_ids.append(self.categories.intern(category))
+                    self.item_names.append(item_name)
+                    base_prices.append(base_price)
+                    item_keys.append(item_key(island_name, item_name))
+            self.island_offsets[island_name] = (start, len(base_prices))
+
+        count = len(base_prices)
+        sell_modifiers = np.zeros(count, dtype=np.float64)
+        buy_modifiers = np.zeros(count, dtype=np.float64)
+        quantity_ids = np.full(count, self.pipeline.default_quantity_id, dtype=np.int8)
+        fluctuated_prices = np.full(count, np.nan)
+        if kept_rows:
+            sell_modifiers[kept_rows] = self.sell_modifiers[old_rows]
+            buy_modifiers[kept_rows] = self.buy_modifiers[old_rows]
+            quantity_ids[kept_rows] = self.quantity_ids[old_rows]
+            fluctuated_prices[kept_rows] = self.fluctuated_prices[old_rows]
+
+        self.base_prices = np.array(base_prices, dtype=np.float64)
+        self.row_categories = np.array(category_ids, dtype=np.int32)
+        self.item_keys = np.array(item_keys, dtype=np.uint64)
+        self.fluctuation_cache.clear()
+        self.sell_modifiers = sell_modifiers
+        self.buy_modifiers = buy_modifiers
+        self.quantity_ids = quantity_ids
+        self.fluctuated_prices = fluctuated_prices
+        self.sell_prices = np.zeros(count, dtype=np.float64)
+        self.buy_prices = np.zeros(count, dtype=np.float64)
+        self.dirty = np.ones(count, dtype=bool)
+
+    @instrumented("PricingEngine.add_items")
+    def add_items(self, items):
+        """Add or reprice items given as (island, category, item, base price) without rebuilding the other rows.
+
+        Every island must already exist, see add_island(). New items go at the
+        end of their island's rows. Like load_islands(), this replaces the item
+        layout rather than changing it in place.
+        """
+        island_offsets = dict(self.island_offsets)
+        island_categories = dict(self.island_categories)
+        island_item_rows = dict(self.island_item_rows)
+        repriced_rows, repriced_prices = [], []
+        added = {}  # island -> [(category id, item, base price)] of new rows
+
+        for island_name, category, item_name, base_price in items:
+            row = island_item_rows[island_name].get((category, item_name))
+            if row is not None:
+                repriced_rows.append(island_offsets[island_name][0] + row)
+                repriced_prices.append(base_price)
+                continue
+            new_rows = added.get(island_name)
+            if new_rows is None:
+                new_rows = added[island_name] = []
+                island_categories[island_name] = list(island_categories[island_name])
+                island_item_rows[island_name] = dict(island_item_rows[island_name])
+            if category not in island_categories[island_name]:
+                island_categories[island_name].append(category)
+            start, end = island_offsets[island_name]
+            island_item_rows[island_name][category, item_name] = end - start + len(new_rows)
+            new_rows.append((self.categories.intern(category), item_name, base_price))
+
+        if repriced_rows:
+            self.base_prices = self.base_prices.copy()  # Shared with snapshots
+            self.base_prices[repriced_rows] = repriced_prices
+            self.fluctuated_prices[repriced_rows] = np.nan
+            self.dirty[repriced_rows] = True
+        self.fluctuation_cache.clear()
+        self.island_categories = island_categories
+        self.island_item_rows = island_item_rows
+        if not added:
+            return
+
+        # Insert each island's new rows at its end, shifting the islands after it
+        positions, category_ids, item_names, base_prices, item_keys = [], [], [], [], []
+        names = []
+        previous = shift = 0
+        for island_name in self.island_names:
+            start, end = island_offsets[island_name]
+            new_rows = added.get(island_name, [])
+            island_offsets[island_name] = (start + shift, end + shift + len(new_rows))
+            if not new_rows:
+                continue
+            shift += len(new_rows)
+            names += self.item_names[previous:end]
+            previous = end
+            for category_id, item_name, base_price in new_rows:
+                positions.append(end)
+                category_ids.append(category_id)
+                item_names.append(item_name)
+                base_prices.append(base_price)
+                item_keys.append(item_key(island_name, item_name))
+            names += item_names[len(item_names) - len(new_rows):]
+        names += self.item_names[previous:]
+
+        def insert(values, new_values, dtype):
+            return np.insert(values, positions, np.asarray(new_values, dtype=dtype))
+
+        self.island_offsets = island_offsets
+        self.item_names = names
+        self.base_prices = insert(self.base_prices, base_prices, np.float64)
+        self.row_categories = insert(self.row_categories, category_ids, np.int32)
+        self.item_keys = insert(self.item_keys, item_keys, np.uint64)
+        count = len(positions)
+        self.sell_modifiers = insert(self.sell_modifiers, np.zeros(count), np.float64)
+        self.buy_modifiers = insert(self.buy_modifiers, np.zeros(count), np.float64)
+        self.quantity_ids = insert(self.quantity_ids, np.full(count, self.pipeline.default_quantity_id), np.int8)
+        self.fluctuated_prices = insert(self.fluctuated_prices, np.full(count, np.nan), np.float64)
+        self.sell_prices = insert(self.sell_prices, np.zeros(count), np.float64)
+        self.buy_prices = insert(self.buy_prices, np.zeros(count), np.float64)
+        self.dirty = insert(self.dirty, np.ones(count), bool)
+
+    def add_island(self, island_name, categories):
+        """Add an island from its {category: {item: base price}} dict."""
+        if island_name not in self.island_offsets:
+            count = len(self.base_prices)
+            self.island_names = self.island_names + [island_name]
+            self.island_offsets = {**self.island_offsets, island_name: (count, count)}
+            self.island_categories = {**self.island_categories, island_name: list(categories)}
+            self.island_item_rows = {**self.island_item_rows, island_name: {}}
+        self.add_items(
+            (island_name, category, item_name, base_price)
+            for category, items in categories.items()
+            for item_name, base_price in items.items()
+        )
+
+    def add_universal_item(self, category, item_name, base_price):
+        """Add or reprice an item on every island."""
+        self.add_items((island_name, category, item_name, base_price) for island_name in self.island_names)
+
+    def snapshot(self):
+        """Return a copy that can be priced on another thread while this engine keeps changing.
+
+        The item layout is shared, since load_islands() and add_items() replace
+        it rather than changing it in place.
+        """
+        engine = copy.copy(self)
+        for name in ("sell_modifiers", "buy_modifiers", "quantity_ids", "fluctuated_prices", "sell_prices", "buy_prices", "dirty"):
+            setattr(engine, name, getattr(self, name).copy())
+        engine.fluctuation_cache = OrderedDict(self.fluctuation_cache)
+        return engine
+
+    def island_rows(self, island_name):
+        """Return the slice of rows belonging to an island."""
+        start, end = self.island_offsets[island_name]
+        return slice(start, end)
+
+    def find_category(self, island_name, item_name):
+        """Return the category holding an item on an island, or None."""
+        item_rows = self.island_item_rows.get(island_name, {})
+        for category in self.island_categories.get(island_name, []):
+            if (category, item_name) in item_rows:
+                return category
+        return None
+
+    def row(self, island_name, category, item_name):
+        """Return the row of an item on an island, or None."""
+        item_rows = self.island_item_rows.get(island_name)
+        row = item_rows.get((category, item_name)) if item_rows is not None else None
+        return None if row is None else self.island_offsets[island_name][0] + row
+
+    def set_global_modifier(self, global_modifier):
+        """Change the global modifier, marking every row dirty if it changed."""
+        if global_modifier != self.global_modifier:
+            self.global_modifier = global_modifier
+            self.dirty.fill(True)
+
+    def reset_modifiers(self):
+        """Clear every per-item sell and buy modifier and quantity."""
+        self.sell_modifiers.fill(0)
+        self.buy_modifiers.fill(0)
+        self.quantity_ids.fill(self.pipeline.default_quantity_id)
+        self.dirty.fill(True)
+
+    def set_item_modifiers(self, island_name, category, item_name, sell_modifier, buy_modifier, quantity=DEFAULT_QUANTITY):
+        """Set the sell and buy modifiers and the quantity of one item. Unknown items are ignored."""
+        row = self.row(island_name, category, item_name)
+        quantity_id = self.pipeline.quantity_id(quantity)
+        if row is not None and (self.sell_modifiers[row], self.buy_modifiers[row], self.quantity_ids[row]) != (
+            sell_modifier,
+            buy_modifier,
+            quantity_id,
+        ):
+            self.sell_modifiers[row] = sell_modifier
+            self.buy_modifiers[row] = buy_modifier
+            self.quantity_ids[row] = quantity_id
+            self.dirty[row] = True
+
+    def set_market(self, market_seed=None, market_tick=None):
+        """Move the market to another seed or tick; prices are refluctuated on the next reprice."""
+        if market_seed is not None:
+            self.market_seed = market_seed
+        if market_tick is not None:
+            self.market_tick = market_tick
+        self.fluctuated_prices.fill(np.nan)
+        self.dirty.fill(True)
+
+    def fluctuated_for_tick(self, rows, tick=None):
+        """Return the fluctuated prices of some rows in a tick (the current one by default)."""
+        tick = self.market_tick if tick is None else tick
+        fluctuation = tick_fluctuations(self.item_keys[rows], self.market_seed, tick, self.pipeline.fluctuation_range)
+        return np.round(self.base_prices[rows] * (1 + fluctuation), 2)
+
+    def fluctuate(self, island_name=None):
+        """Load the current tick's fluctuated prices for one island, or for all islands."""
+        if island_name is None:
+            self.fluctuated_prices[:] = self.fluctuated_for_tick(slice(None))
+            self.dirty.fill(True)
+            return
+
+        rows = self.island_rows(island_name)
+        key = (island_name, self.market_seed, self.market_tick)
+        fluctuated = self.fluctuation_cache.get(key)
+        if fluctuated is None:
+            fluctuated = self.fluctuation_cache[key] = self.fluctuated_for_tick(rows)
+            if len(self.fluctuation_cache) > FLUCTUATION_CACHE_SIZE:
+                self.fluctuation_cache.popitem(last=False)
+        else:
+            self.fluctuation_cache.move_to_end(key)
+
+        changed = self.fluctuated_prices[rows] != fluctuated
+        self.fluctuated_prices[rows] = fluctuated
+        self.dirty[rows] |= changed
+
+    @instrumented("PricingEngine.reprice")
+    def reprice(self, island_name=None):
+        """Recompute sell and buy prices of dirty rows and return the repriced row numbers.
+
+        Rows without a fluctuated price are fluctuated for the current tick first.
+        """
+        start, end = self.island_offsets[island_name] if island_name is not None else (0, len(self.base_prices))
+        rows = np.flatnonzero(self.dirty[start:end]) + start
+        if len(rows) == 0:
+            return rows
+
+        missing = rows[np.isnan(self.fluctuated_prices[rows])]
+        if len(missing):
+            self.fluctuated_prices[missing] = self.fluctuated_for_tick(missing)
+
+        self.sell_prices[rows], self.buy_prices[rows] = self.adjusted_prices(self.fluctuated_prices[rows], rows)
+        self.dirty[rows] = False
+        return rows
+
+    def adjusted_prices(self, fluctuated, rows):
+        """Run the pricing pipeline over fluctuated prices of some rows. Untraded prices are NaN."""
+        return self.pipeline.evaluate(
+            fluctuated, self.sell_modifiers[rows], self.buy_modifiers[rows], self.global_modifier, self.quantity_ids[rows]
+        )
+
+    def prices_for_tick(self, tick, rows=slice(None)):
+        """Return (sell, buy) prices of some rows in any tick without touching the current prices."""
+        return self.adjusted_prices(self.fluctuated_for_tick(rows, tick), rows)
+
+    def calculate(self, island_name=None):
+        """Fluctuate and price one island, or all islands, and return (fluctuated, sell, buy) arrays."""
+        rows = self.island_rows(island_name) if island_name is not None else slice(None)
+        self.fluctuate(island_name)
+        self.reprice(island_name)
+        return self.fluctuated_prices[rows], self.sell_prices[rows], self.buy_prices[rows]
+
+    def row_category_names(self, rows):
+        """Return the category name of each of some rows."""
+        names = self.categories.names
+        return [names[category_id] for category_id in self.row_categories[rows].tolist()]
+
+    def island_results(self, island_name):
+        """Price one island and group the results as {category: [(item, sell, buy), ...]}. Untraded prices are NaN."""
+        _, sell, buy = self.calculate(island_name)
+        start, end = self.island_offsets[island_name]
+
+        results = {category: [] for category in self.island_categories[island_name]}
+        for category_id, item_name, sell_price, buy_price in zip(
+            self.row_categories[start:end].tolist(), self.item_names[start:end], sell.tolist(), buy.tolist()
+        ):
+            results[self.categories.names[category_id]].append((item_name, sell_price, buy_price))
+        return results
+
+def engine_from_config(config, island_names=None):
+    """Build a pricing engine for a saved configuration, optionally for some islands only.
+
+    The saved item rows apply to the configuration's selected island, as in the app.
+    """
+    if island_names is not None:
+        islands = config.get("islands", {})
+        config = {**config, "islands": {island_name: islands[island_name] for island_name in island_names}}
+    world = World()
+    world.load_config(config)
+
+    engine = PricingEngine(world, market_seed=config.get("market_seed", 0))
+    engine.set_market(market_tick=config.get("market_tick", 0))
+    engine.set_global_modifier(config.get("global_modifier", 0))
+
+    selected_island = config.get("selected_island", "")
+    if selected_island in engine.island_offsets:
+        for entry in reversed(config.get("item_entries", [])):  # Reversed so the first matching row wins
+            category = entry.get("category") or engine.find_category(selected_island, entry.get("item"))
+            engine.set_item_modifiers(
+                selected_island,
+                category,
+                entry.get("item"),
+                entry.get("sell_modifier", 0),
+                entry.get("buy_modifier", 0),
+                entry.get("quantity", DEFAULT_QUANTITY),
+            )
+    return engine
+
+class ModifierIndex:
+    """Index item-row modifiers by (island, category, item) so pricing never scans the rows.
+
+    Several rows may pick the same item; the first of them in grid order wins.
+    row_order(row_id) gives a row's grid position (the row id itself by default).
+    """
+
+    def __init__(self, row_order=None):
+        self.row_order = row_order
+        self.clear()
+
+    def clear(self):
+        """Forget every row."""
+        self.row_keys = {}  # row id -> (island, category, item)
+        self.row_modifiers = {}  # row id -> (sell, buy, quantity)
+        self.key_rows = {}  # (island, category, item) -> set of row ids
+
+    def modifiers(self, key):
+        """Return the (sell, buy, quantity) in effect for a key."""
+        rows = self.key_rows.get(key)
+        if not rows:
+            return 0, 0, DEFAULT_QUANTITY
+        return self.row_modifiers[min(rows, key=self.row_order)]
+
+    def update_row(self, row_id, key, sell_modifier, buy_modifier, quantity=DEFAULT_QUANTITY):
+        """Record a row's key, modifiers and quantity and return the keys whose modifiers may have changed."""
+        affected = set(self.remove_row(row_id)) if self.row_keys.get(row_id) != key else set()
+        self.row_keys[row_id] = key
+        self.row_modifiers[row_id] = (sell_modifier, buy_modifier, quantity)
+        self.key_rows.setdefault(key, set()).add(row_id)
+        affected.add(key)
+        return affected
+
+    def remove_row(self, row_id):
+        """Forget a row and return the keys whose modifiers may have changed."""
+        key = self.row_keys.pop(row_id, None)
+        self.row_modifiers.pop(row_id, None)
+        if key is None:
+            return []
+        rows = self.key_rows[key]
+        rows.discard(row_id)
+        if not rows:
+            del self.key_rows[key]
+        return [key]
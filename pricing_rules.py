@@ -0,0 +1,101 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import numpy as np
+
+from world import DEFAULT_QUANTITY, QUANTITIES
+
+# Prices fluctuate by up to this fraction of the base price either way
+FLUCTUATION_RANGE = 0.2
+
+class FluctuationRule:
+    """Fluctuate base prices by up to spread (a fraction) either way, per market tick."""
+
+    def __init__(self, spread=FLUCTUATION_RANGE):
+        self.spread = spread
+
+class ModifierRule:
+    """Add a percentage modifier to both prices: the "global" modifier or the "item" sell/buy modifiers."""
+
+    def __init__(self, source):
+        if source not in ("global", "item"):
+            raise ValueError(f"Unknown modifier source {source!r}")
+        self.source = source
+
+class QuantityRule:
+    """Multiply the prices of items at a quantity. A multiplier of None means that side is not traded."""
+
+    def __init__(self, quantity, sell=1.0, buy=1.0):
+        self.quantity = quantity
+        self.sell = sell
+        self.buy = buy
+
+# The pricing stages described in the README
+DEFAULT_RULES = (
+    FluctuationRule(),
+    ModifierRule("global"),
+    ModifierRule("item"),
+    QuantityRule("None", sell=None, buy=1.5),  # Will not sell, but buys at a high price
+    QuantityRule("Low", sell=1.25, buy=1.25),  # Scarce, so both prices are higher
+    QuantityRule("Normal"),
+    QuantityRule("High", sell=0.5, buy=None),  # Sells dirt cheap, but will not buy
+)
+
+class PricingPipeline:
+    """A list of pricing rules compiled once into a vectorized evaluator.
+
+    Modifier rules collapse into one percentage per side and quantity rules
+    into per-quantity multiplier tables, so evaluating an island is a few
+    array operations with no per-item branching. Prices that are not traded
+    come out as NaN.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = tuple(rules)
+        self.fluctuation_range = 0.0
+        self.use_global_modifier = False
+        self.use_item_modifiers = False
+        self.quantities = list(QUANTITIES)
+        sell_multipliers = {}
+        buy_multipliers = {}
+
+        for rule in self.rules:
+            if isinstance(rule, FluctuationRule):
+                self.fluctuation_range = rule.spread
+            elif isinstance(rule, ModifierRule):
+                if rule.source == "global":
+                    self.use_global_modifier = True
+                else:
+                    self.use_item_modifiers = True
+            elif isinstance(rule, QuantityRule):
+                if rule.quantity not in self.quantities:
+                    self.quantities.append(rule.quantity)
+                for multipliers, multiplier in ((sell_multipliers, rule.sell), (buy_multipliers, rule.buy)):
+                    multiplier = np.nan if multiplier is None else multiplier
+                    multipliers[rule.quantity] = multipliers.get(rule.quantity, 1.0) * multiplier
+            else:
+                raise TypeError(f"Unknown pricing rule {rule!r}")
+
+        self.quantity_ids = {quantity: index for index, quantity in enumerate(self.quantities)}
+        self.default_quantity_id = self.quantity_ids[DEFAULT_QUANTITY]
+        self.sell_multipliers = np.array([sell_multipliers.get(quantity, 1.0) for quantity in self.quantities])
+        self.buy_multipliers = np.array([buy_multipliers.get(quantity, 1.0) for quantity in self.quantities])
+
+    def quantity_id(self, quantity):
+        """Return the id of a quantity, treating unknown ones as the default quantity."""
+        return self.quantity_ids.get(quantity, self.default_quantity_id)
+
+    def evaluate(self, fluctuated, sell_modifiers, buy_modifiers, global_modifier, quantity_ids):
+        """Return (sell, buy) price arrays for fluctuated prices and per-item modifiers and quantity ids."""
+        sell_percent = np.zeros(len(fluctuated))
+        buy_percent = np.zeros(len(fluctuated))
+        if self.use_item_modifiers:
+            sell_percent += sell_modifiers
+            buy_percent += buy_modifiers
+        if self.use_global_modifier:
+            sell_percent += global_modifier
+            buy_percent += global_modifier
+
+        sell = np.round(fluctuated * (1 + sell_percent / 100) * self.sell_multipliers[quantity_ids], 2)
+        buy = np.round(fluctuated * (1 + buy_percent / 100) * self.buy_multipliers[quantity_ids], 2)
+        return sell, buy
@@ -0,0 +1,278 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import argparse
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+
+from arbitrage import ArbitrageIndex
+from persistence import read_configuration
+from pricing import engine_from_config, price_value
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Encoded responses kept until the prices change
+RESPONSE_CACHE_SIZE = 4096
+
+# Longest response line request() accepts; a whole island can be large
+RESPONSE_LIMIT = 1 << 24
+
+# Most items a search returns
+SEARCH_LIMIT = 50
+
+# Type of every optional request field
+FIELD_TYPES = {
+    "op": (str, "a string"),
+    "island": (str, "a string"),
+    "item": (str, "a string"),
+    "query": (str, "a string"),
+    "limit": (int, "a whole number"),
+}
+
+class QuoteServer:
+    """Answer price requests from players over TCP with asyncio.
+
+    Each request and response is one line of JSON:
+      {"op": "islands"}
+      {"op": "quote", "island": ..., "item": ...}  (leave out "item" for the whole island)
+      {"op": "search", "query": ..., "island": ...}  ("island" is optional)
+      {"op": "trades", "item": ..., "limit": ...}  (both optional)
+
+    Requests are served from a pricing engine snapshot. Responses are cached
+    and shared by every client until publish() hands over a new snapshot,
+    e.g. after the DM changes a modifier. The server runs its own event loop,
+    normally on a background thread next to the Tk main loop.
+    """
+
+    def __init__(self, engine=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.clients = {}  # client task -> stream writer
+        self.responses = OrderedDict()  # request key -> encoded response line
+        self.sheets = {}  # island -> {item: (category, sell, buy)}
+        self.item_islands = {}  # lowercase item name -> (item name, [islands])
+        self.arbitrage = None  # ArbitrageIndex, built on the first trades request
+        self.engine = None
+        self.version = 0
+        if engine is not None:
+            self.set_engine(engine)
+
+    def set_engine(self, engine):
+        """Serve prices from another engine and drop every cached response. Runs on the server loop."""
+        if self.engine is None or engine.item_names is not self.engine.item_names:
+            self.item_islands = {}  # Only rebuilt when the islands or items change
+            for island_name in engine.island_names:
+                start, end = engine.island_offsets[island_name]
+                for item_name in engine.item_names[start:end]:
+                    self.item_islands.setdefault(item_name.lower(), (item_name, []))[1].append(island_name)
+        self.engine = engine
+        self.version += 1
+        self.responses.clear()
+        self.sheets.clear()
+        self.arbitrage = None
+
+    def publish(self, engine):
+        """Hand the server a new engine from another thread; the engine is snapshotted here."""
+        snapshot = engine.snapshot()
+        if self.loop is None:
+            self.set_engine(snapshot)
+        else:
+            self.loop.call_soon_threadsafe(self.set_engine, snapshot)
+
+    def island_sheet(self, island_name):
+        """Return the cached {item: (category, sell, buy)} prices of an island."""
+        sheet = self.sheets.get(island_name)
+        if sheet is None:
+            sheet = self.sheets[island_name] = {
+                item_name: (category, price_value(sell), price_value(buy))
+                for category, items in self.engine.island_results(island_name).items()
+                for item_name, sell, buy in items
+            }
+        return sheet
+
+    def answer(self, request):
+        """Return the response to one decoded request."""
+        op = request.get("op")
+        engine = self.engine
+        if op == "islands":
+            return {"islands": engine.island_names, "day": engine.market_tick}
+
+        if op == "quote":
+            island_name = request.get("island")
+            if island_name not in engine.island_offsets:
+                return {"error": f"Unknown island {island_name!r}"}
+            sheet = self.island_sheet(island_name)
+            item_name = request.get("item")
+            if item_name is None:
+                return {
+                    "island": island_name,
+                    "day": engine.market_tick,
+                    "items": [
+                        {"category": category, "item": name, "sell_price": sell, "buy_price": buy}
+                        for name, (category, sell, buy) in sheet.items()
+                    ],
+                }
+            if item_name not in sheet:
+                return {"error": f"{island_name} does not trade {item_name!r}"}
+            category, sell, buy = sheet[item_name]
+            return {
+                "island": island_name,
+                "day": engine.market_tick,
+                "category": category,
+                "item": item_name,
+                "sell_price": sell,
+                "buy_price": buy,
+            }
+
+        if op == "search":
+            query = str(request.get("query", "")).lower()
+            island_name = request.get("island")
+            matches = []
+            for lower_name, (item_name, item_islands) in self.item_islands.items():
+                if query in lower_name and (island_name is None or island_name in item_islands):
+                    matches.append({"item": item_name, "islands": item_islands})
+                    if len(matches) == SEARCH_LIMIT:
+                        break
+            return {"query": query, "items": matches}
+
+        if op == "trades":
+            if self.arbitrage is None:
+                self.arbitrage = ArbitrageIndex(engine)
+            item_name = request.get("item")
+            limit = min(int(request.get("limit", 10)), SEARCH_LIMIT)
+            if item_name is None:
+                trades = self.arbitrage.top_trades(limit)
+            elif item_name in self.arbitrage.item_ids:
+                trades = self.arbitrage.item_trades(item_name, limit)
+            else:
+                return {"error": f"Unknown item {item_name!r}"}
+            return {"day": engine.market_tick, "trades": [trade._asdict() for trade in trades]}
+
+        return {"error": f"Unknown request {op!r}"}
+
+    def respond(self, line):
+        """Return the encoded response line to an encoded request line, from the cache if possible."""
+        try:
+            request = json.loads(line)
+            key = json.dumps(request, sort_keys=True)
+        except (TypeError, ValueError):
+            return b'{"error":"Requests must be one JSON object per line"}\n'
+        if not isinstance(request, dict):
+            return b'{"error":"Requests must be one JSON object per line"}\n'
+        for field, (field_type, description) in FIELD_TYPES.items():
+            value = request.get(field)
+            if value is not None and (not isinstance(value, field_type) or isinstance(value, bool)):
+                return (json.dumps({"error": f"{field!r} must be {description}"}) + "\n").encode()
+
+        response = self.responses.get(key)
+        if response is None:
+            result = self.answer(request)
+            result["version"] = self.version
+            response = self.responses[key] = (json.dumps(result, separators=(",", ":")) + "\n").encode()
+            if len(self.responses) > RESPONSE_CACHE_SIZE:
+                self.responses.popitem(last=False)
+        else:
+            self.responses.move_to_end(key)
+        return response
+
+    async def handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self.clients[task] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(self.respond(line))
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass  # Client went away or sent an overlong line
+        finally:
+            self.clients.pop(task, None)
+            writer.close()
+
+    async def start(self):
+        """Start listening on the server's event loop; port 0 picks a free port."""
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def shutdown(self):
+        """Stop listening and drop every client; idle clients would otherwise keep the server open."""
+        self.server.close()
+        for writer in self.clients.values():
+            writer.transport.abort()  # Their handlers then read the end of the stream and return
+        await asyncio.gather(*self.clients, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.shutdown()
+
+    def start_in_thread(self):
+        """Run the server on a background thread and return once it is listening."""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.start())
+            except OSError as error:
+                errors.append(error)
+                loop.close()
+                return
+            finally:
+                started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.shutdown())
+            loop.close()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    def stop(self):
+        """Stop a server started with start_in_thread()."""
+        if self.thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.thread = None
+            self.loop = None
+
+async def request(host, port, **message):
+    """Send one request to a quote server and return the decoded response."""
+    reader, writer = await asyncio.open_connection(host, port, limit=RESPONSE_LIMIT)
+    try:
+        writer.write((json.dumps(message) + "\n").encode())
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the prices of a saved configuration to players.")
+    parser.add_argument("config", help="Saved configuration (JSON)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on (0.0.0.0 for the local network)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    args = parser.parse_args(argv)
+
+    server = QuoteServer(engine_from_config(read_configuration(args.config)), args.host, args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import tkinter as tk
+
+# Lines shown per page of results
+PAGE_SIZE = 1000
+
+class ResultsRenderer:
+    """Draw result lines into a Text widget one page at a time.
+
+    A full redraw is a single insert of the whole page. Lines are tagged with a
+    key (the engine row for item lines) so a recalculation can rewrite just the
+    lines whose text changed.
+    """
+
+    def __init__(self, text, page_size=PAGE_SIZE):
+        self.text = text
+        self.page_size = page_size
+        self.page = 0
+        self.lines = []
+        self.line_numbers = {}  # key -> index into self.lines
+        self.page_label = tk.StringVar(value="")
+
+    def page_count(self):
+        return max(1, (len(self.lines) + self.page_size - 1) // self.page_size)
+
+    def set_lines(self, keyed_lines):
+        """Replace every line. keyed_lines is a list of (key or None, text)."""
+        self.lines = [line for _, line in keyed_lines]
+        self.line_numbers = {key: index for index, (key, _) in enumerate(keyed_lines) if key is not None}
+        self.show_page(min(self.page, self.page_count() - 1))
+
+    def update_lines(self, changed):
+        """Rewrite the lines of the given {key: text} and redraw only those visible."""
+        first = self.page * self.page_size
+        visible = []
+        for key, line in changed.items():
+            index = self.line_numbers[key]
+            self.lines[index] = line
+            if first <= index < first + self.page_size:
+                visible.append((index - first + 1, line))
+
+        if len(visible) > self.page_size // 4:
+            self.show_page(self.page)  # One batched redraw is cheaper than many small edits
+            return
+        for line_number, line in visible:
+            self.text.delete(f"{line_number}.0", f"{line_number}.end")
+            self.text.insert(f"{line_number}.0", line)
+
+    def show_page(self, page):
+        """Draw one page of lines with a single insert."""
+        self.page = max(0, min(page, self.page_count() - 1))
+        first = self.page * self.page_size
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "\n".join(self.lines[first:first + self.page_size]))
+        count = self.page_count()
+        self.page_label.set(f"Page {self.page + 1} of {count}" if count > 1 else "")
+
+    def next_page(self):
+        self.show_page(self.page + 1)
+
+    def previous_page(self):
+        self.show_page(self.page - 1)
@@ -0,0 +1,98 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+from bisect import bisect_left, insort
+
+# Most names a search returns; dropdowns load more as the user types
+SEARCH_LIMIT = 200
+
+# Length of the substrings indexed for substring search
+GRAM_SIZE = 3
+
+# Search results kept until the next name is added
+RESULT_CACHE_SIZE = 1024
+
+class SearchIndex:
+    """Case-insensitive prefix and substring search over names.
+
+    Names are kept sorted for prefix search and indexed by every three-letter
+    substring for substring search. Each name can carry tags (e.g. the
+    categories holding an item) to filter on. The substring index is built on
+    the first substring search. Adding a name updates the index in place;
+    results are cached until then.
+    """
+
+    def __init__(self, entries=()):
+        self.keys = []  # Sorted (lowercase name, name)
+        self.tags = {}  # name -> set of tags
+        self.grams = None  # lowercase substring -> set of keys
+        self.results = {}  # (query, tag, limit) -> names
+        for name, tag in entries:
+            self.add(name, tag, sort=False)
+        self.keys.sort()
+
+    def add(self, name, tag=None, sort=True):
+        """Add a name, or another tag to a name that is already indexed."""
+        self.results.clear()
+        if name in self.tags:
+            self.tags[name].add(tag)
+            return
+        self.tags[name] = {tag}
+        key = (name.lower(), name)
+        if sort:
+            insort(self.keys, key)
+        else:
+            self.keys.append(key)
+        if self.grams is not None:
+            self.index_grams(key)
+
+    def index_grams(self, key):
+        for start in range(len(key[0]) - GRAM_SIZE + 1):
+            self.grams.setdefault(key[0][start:start + GRAM_SIZE], set()).add(key)
+
+    def has(self, name, tag=None):
+        """Return whether a name is indexed, with the given tag unless tag is None."""
+        return name in self.tags and (tag is None or tag in self.tags[name])
+
+    def search(self, query="", tag=None, limit=SEARCH_LIMIT):
+        """Return up to limit names containing query, those starting with it first, alphabetically.
+
+        With a tag, only names carrying that tag are returned.
+        """
+        query = query.lower()
+        cache_key = (query, tag, limit)
+        names = self.results.get(cache_key)
+        if names is not None:
+            return names
+
+        names = []
+        keys = self.keys
+        for index in range(bisect_left(keys, (query,)), len(keys)):
+            if len(names) == limit or not keys[index][0].startswith(query):
+                break
+            if tag is None or tag in self.tags[keys[index][1]]:
+                names.append(keys[index][1])
+
+        if len(names) < limit and query:
+            if len(query) >= GRAM_SIZE:
+                if self.grams is None:
+                    self.grams = {}
+                    for key in keys:
+                        self.index_grams(key)
+                grams = sorted(
+                    (self.grams.get(query[start:start + GRAM_SIZE], set()) for start in range(len(query) - GRAM_SIZE + 1)),
+                    key=len,
+                )
+                candidates = sorted(grams[0].intersection(*grams[1:]))
+            else:
+                candidates = keys  # Too short for the substring index
+            for lower_name, name in candidates:
+                if query in lower_name and not lower_name.startswith(query) and (tag is None or tag in self.tags[name]):
+                    names.append(name)
+                    if len(names) == limit:
+                        break
+
+        if len(self.results) >= RESULT_CACHE_SIZE:
+            self.results.clear()
+        self.results[cache_key] = names
+        return names
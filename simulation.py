@@ -0,0 +1,144 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from persistence import read_configuration
+from price_history import PriceHistory
+from pricing import engine_from_config
+
+# Shards per worker process, so uneven islands still balance out
+SHARDS_PER_PROCESS = 4
+
+def simulate_shard(config, island_names, start_tick, days):
+    """Price some islands for every day and return {island: table}.
+
+    Each table holds the island's categories and items plus (days, items)
+    sell and buy arrays.
+    """
+    engine = engine_from_config(config, island_names)
+    sell = np.empty((days, len(engine.base_prices)))
+    buy = np.empty((days, len(engine.base_prices)))
+    for day in range(days):
+        sell[day], buy[day] = engine.prices_for_tick(start_tick + day)
+
+    tables = {}
+    for island_name in island_names:
+        start, end = engine.island_offsets[island_name]
+        tables[island_name] = {
+            "categories": engine.row_category_names(slice(start, end)),
+            "items": engine.item_names[start:end],
+            "sell": sell[:, start:end],
+            "buy": buy[:, start:end],
+        }
+    return tables
+
+def shard_islands(config, shard_count):
+    """Split the islands into shards of roughly equal item counts."""
+    sizes = {
+        island_name: sum(len(items) for items in categories.values())
+        for island_name, categories in config.get("islands", {}).items()
+    }
+    shards = [[] for _ in range(max(1, shard_count))]
+    loads = [0] * len(shards)
+    for island_name in sorted(sizes, key=sizes.get, reverse=True):
+        lightest = loads.index(min(loads))
+        shards[lightest].append(island_name)
+        loads[lightest] += sizes[island_name] + 1
+    return [shard for shard in shards if shard]
+
+def simulate_market(config, days, start_tick=None, processes=None):
+    """Simulate every island for a number of days and return {island: table}, see simulate_shard."""
+    start_tick = config.get("market_tick", 0) if start_tick is None else start_tick
+    processes = processes or os.cpu_count() or 1
+    shards = shard_islands(config, processes * SHARDS_PER_PROCESS)
+    islands = config.get("islands", {})
+    tables = {}
+    if processes == 1 or len(shards) <= 1:
+        for shard in shards:
+            tables.update(simulate_shard(config, shard, start_tick, days))
+        return {island_name: tables[island_name] for island_name in islands}
+
+    # Workers only need the universal items and their own islands
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(
+                simulate_shard,
+                {**config, "islands": {island_name: islands[island_name] for island_name in shard}},
+                shard,
+                start_tick,
+                days,
+            )
+            for shard in shards
+        ]
+        for future in futures:
+            tables.update(future.result())
+    return {island_name: tables[island_name] for island_name in islands}
+
+def price_lists(prices):
+    """Convert a price array to nested lists with None for prices that are not traded."""
+    values = prices.astype(object)
+    values[np.isnan(prices)] = None
+    return values.tolist()
+
+def write_csv(tables, start_tick, file):
+    writer = csv.writer(file)
+    writer.writerow(["day", "island", "category", "item", "sell_price", "buy_price"])
+    for island_name, table in tables.items():
+        for day, (sell, buy) in enumerate(zip(price_lists(table["sell"]), price_lists(table["buy"])), start_tick):
+            writer.writerows(zip([day] * len(sell), [island_name] * len(sell), table["categories"], table["items"], sell, buy))
+
+def write_json(tables, start_tick, file):
+    data = {
+        "start_day": start_tick,
+        "islands": {
+            island_name: {
+                "categories": table["categories"],
+                "items": table["items"],
+                "sell": price_lists(table["sell"]),
+                "buy": price_lists(table["buy"]),
+            }
+            for island_name, table in tables.items()
+        },
+    }
+    file.write(json.dumps(data, separators=(",", ":")))  # dumps encodes in C, dump does not
+
+def write_history(tables, start_tick, history):
+    """Append every simulated day to a PriceHistory, day by day so ticks stay in order."""
+    days = len(next(iter(tables.values()))["sell"]) if tables else 0
+    for day in range(days):
+        for island_name, table in tables.items():
+            history.append(start_tick + day, island_name, table["categories"], table["items"], table["sell"][day], table["buy"][day])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fast-forward the market of a saved configuration.")
+    parser.add_argument("config", help="Saved configuration (JSON)")
+    parser.add_argument("--days", type=int, default=30, help="Number of days to simulate")
+    parser.add_argument("--start-day", type=int, default=None, help="First day (defaults to the saved market day)")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (defaults to the CPU count)")
+    parser.add_argument("--output", default="-", help="Output file, .csv or .json (defaults to CSV on stdout)")
+    parser.add_argument("--history", help="Also append the prices to this price history directory")
+    args = parser.parse_args(argv)
+
+    config = read_configuration(args.config)
+    start_tick = config.get("market_tick", 0) if args.start_day is None else args.start_day
+    tables = simulate_market(config, args.days, start_tick, args.processes)
+    if args.history:
+        write_history(tables, start_tick, PriceHistory(args.history))
+
+    write = write_json if args.output.endswith(".json") else write_csv
+    if args.output == "-":
+        write(tables, start_tick, sys.stdout)
+    else:
+        with open(args.output, "w", newline="") as file:
+            write(tables, start_tick, file)
+
+if __name__ == "__main__":
+    main()
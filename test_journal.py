@@ -0,0 +1,78 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import os
+import tempfile
+import unittest
+
+from persistence import Journal
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "campaign.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def replay(self):
+        journal = Journal(self.path)
+        try:
+            return journal.replay()
+        finally:
+            journal.close()
+
+    def test_replay_after_compaction(self):
+        journal = Journal(self.path)
+        journal.append("island_created", island="Tortuga", categories=["Food", "Trade Goods"])
+        journal.append("item_added", island="Tortuga", category="Food", item="Rum", price=10, all_islands=False)
+        journal.append("row_changed", row="0", values={"category": "Food", "item": "Rum", "sell_modifier": 5})
+        journal.append("market_tick", value=3)
+
+        # The snapshot holds everything so far; later records are only in the journal
+        config = self.replay()
+        journal.compact(config, wait=True)
+        journal.append("island_created", island="Nassau", categories=["Food"])
+        journal.append("item_added", island="Nassau", category="Food", item="Salt", price=2, all_islands=True)
+        journal.append("row_changed", row="1", values={"category": "Food", "item": "Salt", "buy_modifier": -5})
+        journal.append("row_removed", row="0")
+        journal.append("global_modifier", value=15)
+        journal.close()
+
+        self.assertFalse(os.path.exists(self.path + ".journal.compacting"))
+        config = self.replay()
+        self.assertEqual(config["universal_items"], {"Food": {"Salt": 2}})
+        self.assertEqual(config["islands"], {"Tortuga": {"Food": {"Rum": 10}, "Trade Goods": {}}, "Nassau": {"Food": {}}})
+        self.assertEqual(config["row_ids"], ["1"])
+        self.assertEqual(config["item_entries"], [{"category": "Food", "item": "Salt", "buy_modifier": -5}])
+        self.assertEqual((config["market_tick"], config["global_modifier"]), (3, 15))
+
+        # Replaying a replayed world again changes nothing
+        journal = Journal(self.path)
+        journal.compact(config, wait=True)
+        journal.close()
+        self.assertEqual(self.replay(), config)
+
+    def test_replay_after_interrupted_compaction(self):
+        journal = Journal(self.path)
+        journal.append("island_created", island="Tortuga", categories=["Food"])
+        journal.close()
+        # A compaction that rotated the journal but never wrote its snapshot
+        os.replace(self.path + ".journal", self.path + ".journal.compacting")
+
+        journal = Journal(self.path)
+        journal.append("item_added", island="Tortuga", category="Food", item="Rum", price=10, all_islands=False)
+        journal.file.write('{"op": "market_tick", "val')  # Record cut short by a crash
+        journal.close()
+
+        config = self.replay()
+        self.assertEqual(config["islands"], {"Tortuga": {"Food": {"Rum": 10}}})
+
+        # Compacting again keeps the records of the unfinished compaction
+        journal = Journal(self.path)
+        journal.compact(config, wait=True)
+        journal.close()
+        self.assertEqual(self.replay()["islands"], {"Tortuga": {"Food": {"Rum": 10}}})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from benchmark import generate_configuration
+from persistence import read_configuration, write_configuration
+
+# Chunk sizes small enough to cut every number, literal and string somewhere
+CHUNK_SIZES = range(1, 8)
+
+# Values whose end is easy to cut short: numbers, literals and escapes
+TRICKY_VALUES = [
+    0, -7, 12345678901234567890, 3.25, -0.5, 1e-07, 6.02e+23, 1E5, True, False, None,
+    "", "Rum", 'a "quoted" name', "tab\there", "café ⚓", "back\\slash", [], {}, [1, [2, [3]]], {"a": {"b": []}},
+]
+
+def random_value(rng, depth=0):
+    """Return a random JSON value mixing the tricky ones."""
+    kind = rng.randrange(4 if depth < 3 else 2)
+    if kind == 0:
+        return rng.choice(TRICKY_VALUES)
+    if kind == 1:
+        return rng.uniform(-1000, 1000) if rng.random() < 0.5 else rng.randint(-10 ** 6, 10 ** 6)
+    if kind == 2:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {f"key {index} {rng.choice(TRICKY_VALUES)!s}": random_value(rng, depth + 1) for index in range(rng.randrange(4))}
+
+class ReadConfigurationTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "config.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_reads_like_json_load(self, text):
+        with open(self.path, "w") as file:
+            file.write(text)
+        with open(self.path, "r") as file:
+            expected = json.load(file)
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size):
+                config = read_configuration(self.path, chunk_size=chunk_size)
+                self.assertEqual(config, {"islands": {}, "item_entries": [], **expected})
+
+    def test_saved_configuration(self):
+        config = generate_configuration(islands=3, universal_items=20, island_items=5, rows=10)
+        write_configuration(self.path, config)
+        with open(self.path, "r") as file:
+            self.assert_reads_like_json_load(file.read())
+
+    def test_compact_configuration(self):
+        config = generate_configuration(islands=3, universal_items=20, island_items=5, rows=10)
+        self.assert_reads_like_json_load(json.dumps(config, separators=(",", ":")))
+
+    def test_tricky_values(self):
+        config = {
+            "islands": {f"Island {index}": {"Food": {"Rum": value}} for index, value in enumerate(TRICKY_VALUES)},
+            "item_entries": [{"item": "Rum", "sell_modifier": value} for value in TRICKY_VALUES],
+            **{f"value {index}": value for index, value in enumerate(TRICKY_VALUES)},
+        }
+        self.assert_reads_like_json_load(json.dumps(config))
+        self.assert_reads_like_json_load(json.dumps(config, indent="\t", ensure_ascii=False))
+
+    def test_random_values(self):
+        rng = random.Random(0)
+        for _ in range(20):
+            config = {
+                "islands": {f"Island {index}": random_value(rng) for index in range(rng.randrange(3))},
+                "item_entries": [random_value(rng) for _ in range(rng.randrange(3))],
+                "market_tick": random_value(rng),
+            }
+            self.assert_reads_like_json_load(json.dumps(config, indent=rng.choice([None, 0, 2])))
+
+    def test_empty_collections_and_end_of_file(self):
+        self.assert_reads_like_json_load('{"islands":{},"item_entries":[],"market_tick":12}')
+        self.assert_reads_like_json_load('  {\n}\n')
+
+    def test_truncated_file(self):
+        with open(self.path, "w") as file:
+            file.write('{"islands": {"A": {"Food": {"Rum": 12')
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size), self.assertRaises(ValueError):
+                read_configuration(self.path, chunk_size=chunk_size)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from price_history import RUNS_FILE, PriceHistory
+
+# Market days in the order they are recorded; the DM moves the day back once
+TICKS = [0, 1, 2, 2, 5, 3, 3, 7, 1]
+
+class PriceHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+        self.records = []  # (tick, island, item, sell) of every record appended
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def append(self, history, tick, island_name):
+        item_names = ["Rum", "Silk", "Salt"][:1 + tick % 3]
+        sell = [float(tick * 10 + index) for index in range(len(item_names))]
+        history.append(tick, island_name, ["Goods"] * len(item_names), item_names, sell, sell)
+        self.records.extend((tick, island_name, item_name, price) for item_name, price in zip(item_names, sell))
+
+    def assert_tick_ranges(self, history):
+        for start_tick in range(-1, 9):
+            for end_tick in range(start_tick, 10):
+                records = history.tick_range(start_tick, end_tick)
+                expected = sorted((tick, sell) for tick, _, _, sell in self.records if start_tick <= tick < end_tick)
+                self.assertEqual(sorted(zip(records["tick"].tolist(), records["sell"].tolist())), expected)
+
+    def test_tick_ranges_in_and_out_of_order(self):
+        history = PriceHistory(self.path)
+        for tick in TICKS:
+            self.append(history, tick, "Tortuga")
+            self.append(history, tick, "Nassau")
+            self.assert_tick_ranges(history)
+        self.assertFalse(history.ticks_sorted)
+        self.assert_tick_ranges(PriceHistory(self.path))
+
+    def test_runs_are_stored(self):
+        history = PriceHistory(self.path)
+        for tick in TICKS:
+            self.append(history, tick, "Tortuga")
+        reopened = PriceHistory(self.path)
+        self.assertEqual((reopened.run_ticks, reopened.run_starts), (history.run_ticks, history.run_starts))
+
+        # Stores written before runs were kept get them on the next open
+        os.remove(os.path.join(self.path, RUNS_FILE))
+        reopened = PriceHistory(self.path)
+        self.assertEqual((reopened.run_ticks, reopened.run_starts), (history.run_ticks, history.run_starts))
+        self.assert_tick_ranges(reopened)
+
+    def test_run_without_records_after_a_crash(self):
+        history = PriceHistory(self.path)
+        for tick in TICKS:
+            self.append(history, tick, "Tortuga")
+        with open(os.path.join(self.path, RUNS_FILE), "ab") as file:
+            file.write(np.array([9, history.count], dtype=np.uint64).tobytes())
+        reopened = PriceHistory(self.path)
+        self.assertEqual(reopened.last_tick, 7)
+        self.assert_tick_ranges(reopened)
+
+    def test_rejected_tick_changes_nothing(self):
+        history = PriceHistory(self.path)
+        self.append(history, 4, "Tortuga")
+        with self.assertRaises(ValueError):
+            history.append(-1, "Tortuga", ["Goods"], ["Rum"], [1.0], [1.0])
+        reopened = PriceHistory(self.path)
+        self.assertEqual((reopened.count, reopened.ticks_sorted), (history.count, True))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import importlib.util
+import os
+import unittest
+from types import SimpleNamespace
+
+from pricing import PricingEngine
+from world import DEFAULT_CATEGORIES, World
+
+# The app's file name has spaces, so load it by path; its window is never created here
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "DnD Trading Program Blank.py")
+spec = importlib.util.spec_from_file_location("trading_app", APP_PATH)
+trading_app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(trading_app)
+
+class RecordingRenderer:
+    """Stands in for ResultsRenderer, keeping the lines instead of drawing them."""
+
+    def __init__(self):
+        self.lines = {}
+
+    def set_lines(self, keyed_lines):
+        self.lines = {key: line for key, line in keyed_lines if key is not None}
+
+    def update_lines(self, changed):
+        for key, line in changed.items():
+            self.lines[key]  # Only lines that are shown can be updated
+            self.lines[key] = line
+
+class RefreshResultsTest(unittest.TestCase):
+    """refresh_results() after islands or items were added to the engine in place, see on_islands_changed()."""
+
+    def setUp(self):
+        self.world = World({"Food and Beverages": {"Rum": 10, "Bread": 2}})
+        self.world.add_island("Tortuga", DEFAULT_CATEGORIES)
+        self.world.add_item("Tortuga", "Trade Goods", "Silk", 40)
+        self.engine = PricingEngine(self.world, market_seed=1)
+        self.app = SimpleNamespace(
+            pricing_engine=self.engine, results_island="Tortuga", result_lines={}, results_renderer=RecordingRenderer()
+        )
+        self.refresh()  # Like Calculate Prices
+
+    def refresh(self, islands_changed=False):
+        if islands_changed:
+            self.app.result_lines = {}  # Engine rows were renumbered
+        trading_app.TradingApp.refresh_results(self.app)
+
+    def shown_items(self):
+        return sorted(line.split(" - ")[0] for line in self.app.results_renderer.lines.values())
+
+    def test_add_island(self):
+        self.world.add_island("Nassau", DEFAULT_CATEGORIES)
+        self.engine.add_island("Nassau", self.world["Nassau"])
+        self.refresh(islands_changed=True)
+        self.assertEqual(self.shown_items(), ["Bread", "Rum", "Silk"])
+
+    def test_add_item(self):
+        self.world.add_item("Tortuga", "Trade Goods", "Pearls", 90)
+        self.engine.add_items([("Tortuga", "Trade Goods", "Pearls", 90)])
+        self.refresh(islands_changed=True)
+        self.assertEqual(self.shown_items(), ["Bread", "Pearls", "Rum", "Silk"])
+
+    def test_add_universal_item(self):
+        self.world.add_universal_item("Food and Beverages", "Salt", 3)
+        self.engine.add_universal_item("Food and Beverages", "Salt", 3)
+        self.refresh(islands_changed=True)
+        self.assertEqual(self.shown_items(), ["Bread", "Rum", "Salt", "Silk"])
+
+        # Later modifier changes only rewrite the changed lines
+        self.engine.set_item_modifiers("Tortuga", "Food and Beverages", "Salt", 100, 0)
+        self.refresh()
+        self.assertEqual(len(self.app.result_lines), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import unittest
+
+from world import DEFAULT_CATEGORIES, World
+
+class WorldTest(unittest.TestCase):
+    def setUp(self):
+        self.world = World(
+            {"Food and Beverages": {"Rum": 10, "Bread": 2}},
+            {"Tortuga": {"Food and Beverages": {"Rum": 12}, "Trade Goods": {}}, "Nassau": {}},
+        )
+
+    def test_own_prices_win_over_loaded_universal_prices(self):
+        self.assertEqual(self.world["Tortuga"], {"Food and Beverages": {"Rum": 12, "Bread": 2}, "Trade Goods": {}})
+        self.assertEqual(self.world["Nassau"], {"Food and Beverages": {"Rum": 10, "Bread": 2}})
+
+    def test_the_price_set_last_wins(self):
+        self.world.add_universal_item("Food and Beverages", "Rum", 20)
+        self.assertEqual(self.world["Tortuga"]["Food and Beverages"]["Rum"], 20)
+        self.world.add_item("Tortuga", "Food and Beverages", "Rum", 5)
+        self.assertEqual(self.world["Tortuga"]["Food and Beverages"]["Rum"], 5)
+        self.assertEqual(self.world["Nassau"]["Food and Beverages"]["Rum"], 20)
+
+    def test_adding_to_every_island_leaves_the_islands_alone(self):
+        overrides = self.world.island_overrides["Tortuga"]["Food and Beverages"]
+        self.world.add_universal_item("Food and Beverages", "Rum", 20)
+        self.assertEqual(overrides, {"Rum": 12})
+
+    def test_to_config_round_trip(self):
+        self.world.add_universal_item("Food and Beverages", "Rum", 20)
+        self.world.add_item("Nassau", "Spices and Plants", "Pepper", 7)
+        config = self.world.to_config()
+        self.assertEqual(config["islands"]["Tortuga"], {"Food and Beverages": {}, "Trade Goods": {}})
+        loaded = World()
+        loaded.load_config(config)
+        self.assertEqual({name: loaded[name] for name in loaded}, {name: self.world[name] for name in self.world})
+
+    def test_to_config_is_a_copy(self):
+        config = self.world.to_config()
+        self.world.add_item("Tortuga", "Trade Goods", "Silk", 40)
+        self.world.add_universal_item("Food and Beverages", "Salt", 3)
+        self.assertEqual(config["islands"]["Tortuga"]["Trade Goods"], {})
+        self.assertNotIn("Salt", config["universal_items"]["Food and Beverages"])
+
+    def test_new_islands_share_their_categories(self):
+        self.world.add_island("Havana", DEFAULT_CATEGORIES)
+        self.world.add_island("Port Royal", DEFAULT_CATEGORIES)
+        self.assertIs(self.world.island_category_lists["Havana"], self.world.island_category_lists["Port Royal"])
+        self.assertEqual(self.world.island_overrides["Havana"], {})
+        self.assertEqual(list(self.world["Havana"]), list(DEFAULT_CATEGORIES))
+
+if __name__ == "__main__":
+    unittest.main()
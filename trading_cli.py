@@ -0,0 +1,106 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+from persistence import read_configuration
+from pricing import engine_from_config, price_text, price_value  # Never import tkinter here, it needs a display and slows startup
+
+def price_sheets(config, island_names=None, day=None):
+    """Price some islands (all by default) of a configuration and return {island: results}.
+
+    Results are grouped as {category: [(item, sell, buy), ...]} like
+    PricingEngine.island_results. Islands that do not exist are skipped.
+    """
+    islands = config.get("islands", {})
+    island_names = [island_name for island_name in (island_names or islands) if island_name in islands]
+    engine = engine_from_config(config, island_names)
+    if day is not None:
+        engine.set_market(market_tick=day)
+    return {island_name: engine.island_results(island_name) for island_name in island_names}
+
+def write_text(sheets, file):
+    """Write sheets in the layout of the app's results box."""
+    for config_path, (day, islands) in sheets.items():
+        for island_name, results in islands.items():
+            file.write(f"{island_name} ({config_path}, day {day})\n\n")
+            for category, items in results.items():
+                file.write(f"{category}\n{'=' * len(category)}\n")
+                file.writelines(
+                    f"{item_name} - Sell Price: {price_text(sell)}, Buy Price: {price_text(buy)}\n"
+                    for item_name, sell, buy in items
+                )
+                file.write("\n")
+
+def write_csv(sheets, file):
+    writer = csv.writer(file)
+    writer.writerow(["config", "day", "island", "category", "item", "sell_price", "buy_price"])
+    for config_path, (day, islands) in sheets.items():
+        for island_name, results in islands.items():
+            for category, items in results.items():
+                writer.writerows(
+                    (config_path, day, island_name, category, item_name, price_value(sell), price_value(buy))
+                    for item_name, sell, buy in items
+                )
+
+def write_json(sheets, file):
+    data = {
+        config_path: {
+            "day": day,
+            "islands": {
+                island_name: {
+                    category: [
+                        {"item": item_name, "sell_price": price_value(sell), "buy_price": price_value(buy)}
+                        for item_name, sell, buy in items
+                    ]
+                    for category, items in results.items()
+                }
+                for island_name, results in islands.items()
+            },
+        }
+        for config_path, (day, islands) in sheets.items()
+    }
+    file.write(json.dumps(data, separators=(",", ":")))
+
+WRITERS = {"text": write_text, "csv": write_csv, "json": write_json}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print price sheets of saved configurations without the GUI.")
+    parser.add_argument("configs", nargs="+", metavar="config", help="Saved configuration (JSON)")
+    parser.add_argument("--island", action="append", dest="islands", help="Island to price (repeatable, defaults to all)")
+    parser.add_argument("--day", type=int, default=None, help="Market day (defaults to each saved market day)")
+    parser.add_argument("--format", choices=sorted(WRITERS), default=None, help="Output format (defaults to the output extension, else text)")
+    parser.add_argument("--output", default="-", help="Output file (defaults to stdout)")
+    parser.add_argument("--list-islands", action="store_true", help="Only print the island names of each configuration")
+    args = parser.parse_args(argv)
+
+    sheets = {}
+    for config_path in args.configs:
+        try:
+            config = read_configuration(config_path)
+        except (OSError, ValueError) as error:
+            parser.exit(1, f"{parser.prog}: cannot read {config_path}: {error}\n")
+        if args.list_islands:
+            print("\n".join(config.get("islands", {})))
+            continue
+        for island_name in args.islands or []:
+            if island_name not in config.get("islands", {}):
+                print(f"{parser.prog}: {config_path} has no island {island_name!r}", file=sys.stderr)
+        day = config.get("market_tick", 0) if args.day is None else args.day
+        sheets[config_path] = (day, price_sheets(config, args.islands, day))
+    if args.list_islands:
+        return
+
+    output_format = args.format or {".csv": "csv", ".json": "json"}.get(os.path.splitext(args.output)[1], "text")
+    if args.output == "-":
+        WRITERS[output_format](sheets, sys.stdout)
+    else:
+        with open(args.output, "w", newline="") as file:
+            WRITERS[output_format](sheets, file)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# Copyright (c) 2025 Nico Mullin
+# Licensed under the MIT License. See LICENSE file for details.
+
+import sys
+from collections.abc import Mapping
+
+# Categories every new island starts with
+DEFAULT_CATEGORIES = (
+    "Textiles and Fabrics",
+    "Food and Beverages",
+    "Spices and Plants",
+    "Tools, Ship and Supplies",
+    "Animal and Livestock Products",
+    "Trade Goods",
+    "Artistic and Decorative Items",
+    "Rare and Collectible Items",
+    "Religious and Cultural Items",
+    "Furniture and Household Goods",
+    "Navigation and Writing Tools",
+    "Weapons and Explosives",
+)
+
+# Quantity states of an item row; items without a row trade at the default quantity
+QUANTITIES = ("None", "Normal", "Low", "High")
+DEFAULT_QUANTITY = "Normal"
+
+class CategoryTable:
+    """Interned category names with small integer ids."""
+
+    __slots__ = ("names", "ids")
+
+    def __init__(self):
+        self.names = []  # id -> name
+        self.ids = {}  # name -> id
+
+    def intern(self, name):
+        """Return the id of a category name, adding it if it is new."""
+        category_id = self.ids.get(name)
+        if category_id is None:
+            category_id = self.ids[sys.intern(name)] = len(self.names)
+            self.names.append(sys.intern(name))
+        return category_id
+
+    def name(self, name):
+        """Return the shared string object for a category name."""
+        return self.names[self.intern(name)]
+
+class ItemRow:
+    """One row of the item-modifier grid."""
+
+    __slots__ = ("category", "item", "sell_modifier", "buy_modifier", "quantity")
+
+    def __init__(self, category="", item="", sell_modifier=0, buy_modifier=0, quantity="None"):
+        self.category = category
+        self.item = item
+        self.sell_modifier = sell_modifier
+        self.buy_modifier = buy_modifier
+        self.quantity = quantity
+
+    @classmethod
+    def from_dict(cls, values):
+        """Build a row from a saved item entry, ignoring unknown keys."""
+        return cls(**{field: values[field] for field in cls.__slots__ if field in values})
+
+    def to_dict(self):
+        """Return the row as a saved item entry."""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+class World(Mapping):
+    """Islands that share one universal catalog and store only their own items.
+
+    Reading world[island] returns the island's merged {category: {item: price}}
+    view. Whichever price was set last wins: an island's own price wins over
+    the universal one unless the item was added to every island afterwards.
+    Every price carries the generation it was set in, so adding an item to
+    every island only touches the universal catalog and the merged view
+    resolves the precedence when it is built. Islands keep their category
+    lists as shared tuples and only store the categories they have items in.
+    """
+
+    def __init__(self, universal_items=None, island_overrides=None):
+        self.categories = CategoryTable()
+        self.category_lists = {}  # tuple of categories -> the shared equal tuple
+        self.generation = 0  # Bumped by every price set; loaded prices are generation 0
+        self.universal_items = self.intern_categories(universal_items or {})  # category -> {item: base price}
+        self.universal_generations = {}  # (category, item) -> generation its universal price was set in
+        self.island_category_lists = {}  # island -> tuple of its own categories, in display order
+        self.island_overrides = {}  # island -> {category: {item: price}}, non-empty categories only
+        self.override_generations = {}  # (island, category, item) -> generation its own price was set in
+        for island_name, categories in (island_overrides or {}).items():
+            island_name = sys.intern(island_name)
+            categories = self.intern_categories(categories)
+            self.island_category_lists[island_name] = self.category_list(categories)
+            self.island_overrides[island_name] = {category: items for category, items in categories.items() if items}
+
+    def intern_categories(self, categories):
+        """Rebuild a {category: {item: price}} dict with shared category and item strings."""
+        return {
+            self.categories.name(category): {sys.intern(item_name): price for item_name, price in items.items()}
+            for category, items in categories.items()
+        }
+
+    def category_list(self, categories):
+        """Return the shared tuple of some category names, so islands with the same categories share one."""
+        categories = tuple(categories)
+        shared = self.category_lists.get(categories)
+        if shared is None:
+            shared = self.category_lists[categories] = tuple(self.categories.name(category) for category in categories)
+        return shared
+
+    def load_config(self, config):
+        """Replace everything with the "universal_items" and "islands" of a saved configuration."""
+        self.__init__(config.get("universal_items"), config.get("islands"))
+
+    def own_items(self, island_name, category):
+        """Return the island's own {item: price} of a category that still win over the universal prices."""
+        items = self.island_overrides[island_name].get(category)
+        if not items or not self.universal_generations:
+            return items or {}
+        universal_generations = self.universal_generations
+        override_generations = self.override_generations
+        return {
+            item_name: price
+            for item_name, price in items.items()
+            if override_generations.get((island_name, category, item_name), 0)
+            >= universal_generations.get((category, item_name), 0)
+        }
+
+    def to_config(self):
+        """Return new "universal_items" and "islands" entries of a saved configuration.
+
+        They share nothing with the world, so they can be encoded on another
+        thread while the world changes.
+        """
+        return {
+            "universal_items": {category: dict(items) for category, items in self.universal_items.items()},
+            "islands": {
+                island_name: {category: dict(self.own_items(island_name, category)) for category in categories}
+                for island_name, categories in self.island_category_lists.items()
+            },
+        }
+
+    def __getitem__(self, island_name):
+        categories = self.island_category_lists[island_name]
+        merged = {
+            category: {**self.universal_items.get(category, {}), **self.own_items(island_name, category)}
+            for category in categories
+        }
+        for category, items in self.universal_items.items():
+            if category not in merged:
+                merged[category] = dict(items)
+        return merged
+
+    def __contains__(self, island_name):
+        return island_name in self.island_overrides
+
+    def __iter__(self):
+        return iter(self.island_overrides)
+
+    def __len__(self):
+        return len(self.island_overrides)
+
+    def add_island(self, island_name, categories):
+        """Add an island with the given (empty) categories."""
+        island_name = sys.intern(island_name)
+        self.island_category_lists[island_name] = self.category_list(categories)
+        self.island_overrides[island_name] = {}
+
+    def add_item(self, island_name, category, item_name, price):
+        """Add or reprice an item on one island only."""
+        category, item_name = self.categories.name(category), sys.intern(item_name)
+        if category not in self.island_category_lists[island_name]:
+            self.island_category_lists[island_name] = self.category_list(self.island_category_lists[island_name] + (category,))
+        self.island_overrides[island_name].setdefault(category, {})[item_name] = price
+        self.generation += 1
+        self.override_generations[island_name, category, item_name] = self.generation
+
+    def add_universal_item(self, category, item_name, price):
+        """Add or reprice an item on every island, existing and future.
+
+        The new price also wins over every island's own price for the item
+        set before, without touching the islands.
+        """
+        category, item_name = self.categories.name(category), sys.intern(item_name)
+        self.universal_items.setdefault(category, {})[item_name] = price
+        self.generation += 1
+        self.universal_generations[category, item_name] = self.generation